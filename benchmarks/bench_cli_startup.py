@@ -0,0 +1,100 @@
+"""Startup benchmark for the github-metrics entry point, against a time budget
+
+Imports scripts.gh_metrics in fresh interpreters with python -X importtime,
+and reports its cumulative import time, with the slowest modules it imports.
+--help and shell completion only pay this import, so it's kept under BUDGET_MS,
+without the modules in DEFERRED_MODULES, which the commands import when they run.
+
+Run from the repository root, exits with an error when over budget:
+    python -m benchmarks.bench_cli_startup
+"""
+
+import argparse
+import subprocess
+import sys
+
+ENTRY_MODULE = "scripts.gh_metrics"
+BUDGET_MS = 100
+# imported by the commands when they run, never by --help
+DEFERRED_MODULES = [
+    "box",
+    "dateutil",
+    "dynaconf",
+    "gql",
+    "requests",
+    "tabulate",
+    "utils.GQL_Queries.github_wrappers",
+    "utils.metrics_calculators",
+]
+
+
+def import_times(module):
+    """{module: (self us, cumulative us)} from python -X importtime, in a fresh interpreter"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line.partition(":")[2].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def stale_choices():
+    """Option choices hardcoded in the entry point, that differ from their source"""
+    from tabulate import multiline_formats
+
+    from scripts import gh_metrics
+    from utils import exports
+    from utils import metrics_calculators
+
+    stale = []
+    if set(gh_metrics.TABLE_FORMATS) != set(multiline_formats):
+        stale.append("TABLE_FORMATS, tabulate.multiline_formats")
+    if gh_metrics.METRICS_ENGINES != metrics_calculators.ENGINES:
+        stale.append("METRICS_ENGINES, metrics_calculators.ENGINES")
+    if gh_metrics.OUTPUT_FORMATS != ["html", *exports.SUFFIXES]:
+        stale.append("OUTPUT_FORMATS, exports.SUFFIXES")
+    return stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # the fastest round, the first ones also pay for reading cold .pyc files
+    times = min(
+        (import_times(ENTRY_MODULE) for _ in range(args.rounds)),
+        key=lambda t: t[ENTRY_MODULE][1],
+    )
+    startup_ms = times[ENTRY_MODULE][1] / 1e3
+    print(f"{ENTRY_MODULE} import, best of {args.rounds} rounds")
+    print(f"{'cumulative':<50} {startup_ms:>10.1f} ms  (budget {args.budget_ms} ms)")
+    top = args.top
+    slowest = sorted(times.items(), key=lambda t: -t[1][0])
+    for name, (self_us, _) in slowest[:top]:
+        print(f"{name:<50} {self_us / 1e3:>10.1f} ms")
+
+    problems = [
+        f"imports {name}"
+        for name in DEFERRED_MODULES
+        if any(m == name or m.startswith(f"{name}.") for m in times)
+    ]
+    problems += [f"stale choices in {names}" for names in stale_choices()]
+    if startup_ms > args.budget_ms:
+        problems.append(f"over budget, {startup_ms:.1f} ms")
+    if problems:
+        raise SystemExit(f"{ENTRY_MODULE} startup: " + ", ".join(problems))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark the single_pr_metrics engines against each other on synthetic PRs
+
+Times building the PR metrics and statistics tables from wrapped PRs with the
+python engine (PRWrapper properties) and the columnar engine (numpy arrays),
+and checks that both build the same tables.
+
+Needs numpy, from the 'fast' extra. Run from the repository root:
+    python -m benchmarks.bench_metrics_engines --pr-count 50000
+"""
+
+import argparse
+import json
+import math
+import tempfile
+from pathlib import Path
+
+from benchmarks import synthetic_fixture
+from benchmarks.bench_pr_metrics import best_of
+from config import settings
+from utils import columnar_metrics
+from utils import metrics_calculators
+from utils.GQL_Queries.github_wrappers import GQLClient
+from utils.GQL_Queries.github_wrappers import RepoWrapper
+from utils.GQL_Queries.replay_transport import write_fixture
+
+
+def same_tables(python_tables, columnar_tables):
+    """PR metrics and sketches must match exactly, statistics can differ in the last float digits"""
+    python_prs, python_stats, python_sketches = python_tables
+    columnar_prs, columnar_stats, columnar_sketches = columnar_tables
+    return (
+        python_prs == columnar_prs
+        and python_sketches == columnar_sketches
+        and all(
+            p.keys() == c.keys()
+            and all(
+                p[k] == c[k] or math.isclose(p[k], c[k], rel_tol=1e-12)
+                for k in p
+                if k != "Metric"
+            )
+            for p, c in zip(python_stats, columnar_stats)
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pr-count", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    fixture_path = Path(tempfile.mkdtemp()).joinpath("synthetic.json.gz")
+    write_fixture(fixture_path, synthetic_fixture.synthetic_responses(args.pr_count))
+    GQLClient.configure(validate=False, replay_path=fixture_path)
+    settings.set("reviewer_teams", synthetic_fixture.REVIEWER_TEAMS)
+
+    repo = RepoWrapper(synthetic_fixture.ORGANIZATION, synthetic_fixture.REPO_NAME)
+    raw_nodes = json.dumps(repo._fetch_pr_nodes(count=args.pr_count))
+
+    def wrapped_prs():
+        # PRWrapper caches its properties, every round needs fresh instances
+        return ([repo.wrap_pr_node(n) for n in json.loads(raw_nodes)],)
+
+    prs = wrapped_prs()[0]
+    python_tables = metrics_calculators.pr_review_metrics(wrapped_prs()[0])
+    columnar_tables = columnar_metrics.pr_review_metrics(prs, repo.reviewer_index)
+    if not same_tables(python_tables, columnar_tables):
+        raise SystemExit("The columnar engine built different tables")
+
+    timings = {
+        "python": best_of(
+            args.rounds, metrics_calculators.pr_review_metrics, setup=wrapped_prs
+        ),
+        "columnar": best_of(
+            args.rounds,
+            lambda: columnar_metrics.pr_review_metrics(prs, repo.reviewer_index),
+        ),
+    }
+    print(f"{args.pr_count} synthetic PRs, best of {args.rounds} rounds, same tables")
+    for name, seconds in timings.items():
+        print(f"{name:<10} {seconds * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
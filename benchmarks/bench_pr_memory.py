@@ -0,0 +1,67 @@
+"""Memory benchmark for wrapped PRs, the footprint of PRWrapper and its timeline events
+
+Wraps synthetic PR nodes (see synthetic_fixture) with RepoWrapper.wrap_pr_node,
+and reports the memory still allocated for the wrapped PRs once the raw nodes are freed,
+measured with tracemalloc, and the time taken to wrap them.
+
+Run from the repository root:
+    python -m benchmarks.bench_pr_memory --pr-count 10000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from benchmarks import synthetic_fixture
+from utils.GQL_Queries.github_wrappers import RepoWrapper
+
+
+def synthetic_pr_nodes(pr_count):
+    """Raw PR nodes from the synthetic fixture's PR pages, serialized"""
+    return json.dumps(
+        [
+            pr_node
+            for response in synthetic_fixture.synthetic_responses(pr_count).values()
+            if response["operation"] == "getPRs"
+            for pr_node in response["data"]["repository"]["pullRequests"]["nodes"]
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pr-count", type=int, default=10000)
+    args = parser.parse_args()
+
+    raw_nodes = synthetic_pr_nodes(args.pr_count)
+    repo = RepoWrapper(synthetic_fixture.ORGANIZATION, synthetic_fixture.REPO_NAME)
+
+    # timed without tracing, tracemalloc slows down allocations a lot
+    pr_nodes = json.loads(raw_nodes)
+    started = time.perf_counter()
+    [repo.wrap_pr_node(n) for n in pr_nodes]
+    wrap_seconds = time.perf_counter() - started
+
+    del pr_nodes
+    gc.collect()
+    tracemalloc.start()
+    pr_nodes = json.loads(raw_nodes)
+    prs = [repo.wrap_pr_node(n) for n in pr_nodes]
+    del pr_nodes
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    event_count = sum(len(pr.timeline_events) for pr in prs)
+    print(f"{len(prs)} synthetic PRs, {event_count} timeline events")
+    print(
+        f"retained  {retained / 2 ** 20:>10.1f} MiB  {retained / len(prs):>8.0f} B/PR"
+    )
+    print(f"peak      {peak / 2 ** 20:>10.1f} MiB")
+    print(f"wrapping  {wrap_seconds * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Offline benchmark for wrapping PR nodes and calculating metrics from them
+
+Replays a synthetic fixture (see synthetic_fixture) through the GQLClient, so nothing
+is fetched from GitHub and timings are reproducible.
+Times wrapping raw PR nodes as PRWrapper, RepoWrapper.pull_requests including replayed
+paging, and the single_pr_metrics and reviewer_actions calculators.
+
+Run from the repository root:
+    python -m benchmarks.bench_pr_metrics --pr-count 10000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks import synthetic_fixture
+from config import settings
+from utils import metrics_calculators
+from utils.GQL_Queries.github_wrappers import GQLClient
+from utils.GQL_Queries.github_wrappers import RepoWrapper
+from utils.GQL_Queries.replay_transport import write_fixture
+
+
+def best_of(rounds, func, setup=None):
+    """Fastest of the rounds, in seconds, setup output is passed to func untimed"""
+    timings = []
+    for _ in range(rounds):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pr-count", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    fixture_path = Path(tempfile.mkdtemp()).joinpath("synthetic.json.gz")
+    write_fixture(fixture_path, synthetic_fixture.synthetic_responses(args.pr_count))
+    GQLClient.configure(validate=False, replay_path=fixture_path)
+    settings.set("reviewer_teams", synthetic_fixture.REVIEWER_TEAMS)
+    org, repo_name = synthetic_fixture.ORGANIZATION, synthetic_fixture.REPO_NAME
+
+    repo = RepoWrapper(org, repo_name)
+    repo.reviewer_index  # teams lookup isn't part of the wrapping
+    pr_nodes = repo._fetch_pr_nodes(count=args.pr_count)
+
+    timings = {
+        "wrap_pr_node": best_of(
+            args.rounds, lambda: [repo.wrap_pr_node(n) for n in pr_nodes]
+        ),
+        "pull_requests": best_of(
+            args.rounds, lambda: repo.pull_requests(count=args.pr_count)
+        ),
+        "single_pr_metrics": best_of(
+            args.rounds,
+            lambda: metrics_calculators.single_pr_metrics(
+                org, repo_name, pr_count=args.pr_count
+            ),
+        ),
+        "reviewer_actions": best_of(
+            args.rounds,
+            lambda: metrics_calculators.reviewer_actions(
+                org, repo_name, pr_count=args.pr_count
+            ),
+        ),
+    }
+    print(f"{args.pr_count} synthetic PRs, best of {args.rounds} rounds")
+    for name, seconds in timings.items():
+        print(f"{name:<20} {seconds * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Micro-benchmark for the per-call cost of query documents in the PR paging loop
+
+Compares parsing the query string with gql() on every page, as the paging loop used to,
+against fetching the parsed document from the registry.
+
+Run from the repository root:
+    python -m benchmarks.bench_query_documents
+"""
+
+import timeit
+
+from gql import gql
+
+from utils.GQL_Queries import pr_query
+from utils.GQL_Queries import registry
+
+CALLS = 1000
+
+
+def main():
+    registry.configure(validate=False)  # no schema snapshot needed to time parsing
+    timings = {
+        "gql() per page": timeit.timeit(
+            lambda: gql(pr_query.pr_review_query), number=CALLS
+        ),
+        "registry.document": timeit.timeit(
+            lambda: registry.document(pr_query.pr_review_query), number=CALLS
+        ),
+        "gql() timeline batch": timeit.timeit(
+            lambda: gql(pr_query.pr_timeline_pages_query(20)), number=CALLS
+        ),
+        "registry.built_document": timeit.timeit(
+            lambda: registry.built_document(pr_query.pr_timeline_pages_query, 20),
+            number=CALLS,
+        ),
+    }
+    for name, seconds in timings.items():
+        print(f"{name:<25} {seconds / CALLS * 1e6:>10.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Generate a replay fixture for a synthetic repository, for offline benchmarks
+
+The fixture answers the queries made by pr-report and reviewer-report for the repo,
+with pr_count PRs of up to 10 timeline events each, and the org's reviewer teams.
+PRs are paged 100 at a time, newest first, like GitHub orders them by CREATED_AT.
+
+Run from the repository root, then replay it with the report commands:
+    python -m benchmarks.synthetic_fixture --pr-count 10000 fixture.json.gz
+    github-metrics --no-cache --replay fixture.json.gz reviewer-report --org Synthetic \
+        --repo synthetic --pr-count 10000
+
+reviewer-report also needs the teams in settings, see REVIEWER_TEAMS
+"""
+
+import argparse
+import random
+from datetime import datetime
+from datetime import timedelta
+
+from utils.GQL_Queries import pr_query
+from utils.GQL_Queries import registry
+from utils.GQL_Queries import review_teams_query
+from utils.GQL_Queries.github_wrappers import GH_TS_FMT
+from utils.GQL_Queries.replay_transport import fixture_key
+from utils.GQL_Queries.replay_transport import fixture_response
+from utils.GQL_Queries.replay_transport import write_fixture
+
+ORGANIZATION = "Synthetic"
+REPO_NAME = "synthetic"
+PAGE_SIZE = 100
+TIMELINE_COUNT = 10  # the default $timelineCount, so no timeline pages are needed
+TIER1 = [f"tier1-{i}" for i in range(8)]
+TIER2 = [f"tier2-{i}" for i in range(4)]
+CONTRIBUTORS = [f"contributor-{i}" for i in range(40)]
+# reviewer_teams setting for the synthetic repo
+REVIEWER_TEAMS = {ORGANIZATION: {REPO_NAME: {"tier1": "tier-1", "tier2": "tier-2"}}}
+# the scheduler never waits on replayed responses
+RATE_LIMIT = {"cost": 1, "remaining": 5000, "resetAt": "2000-01-01T00:00:00Z"}
+
+
+def timestamp(dt):
+    return dt.strftime(GH_TS_FMT)
+
+
+def synthetic_event(rng, created_at, pr_author):
+    """Raw timeline item node, like the ones selected by timelineItemFields"""
+    typename = rng.choices(
+        [
+            "PullRequestReview",
+            "IssueComment",
+            "ConvertToDraftEvent",
+            "ReadyForReviewEvent",
+        ],
+        weights=[6, 3, 1, 1],
+    )[0]
+    if typename in ("ConvertToDraftEvent", "ReadyForReviewEvent"):
+        return {
+            "__typename": typename,
+            "createdAt": timestamp(created_at),
+            "actor": {"login": pr_author},
+        }
+    author = rng.choice(TIER1 + TIER2 + CONTRIBUTORS + [pr_author])
+    event = {
+        "__typename": typename,
+        "author": {"login": author},
+        "createdAt": timestamp(created_at),
+    }
+    if typename == "PullRequestReview":
+        event["state"] = rng.choice(["APPROVED", "CHANGES_REQUESTED", "COMMENTED"])
+        event["comments"] = {"totalCount": rng.randint(0, 5)}
+    return event
+
+
+def synthetic_pr_node(rng, number, created_at):
+    """Raw PR node, like the ones selected by pullRequestFields"""
+    author = rng.choice(CONTRIBUTORS + TIER1)
+    event_times = sorted(
+        created_at + timedelta(minutes=rng.randint(1, 60 * 24 * 14))
+        for _ in range(rng.randint(0, TIMELINE_COUNT))
+    )
+    events = [synthetic_event(rng, t, author) for t in event_times]
+    state = rng.choices(["MERGED", "OPEN", "CLOSED"], weights=[7, 2, 1])[0]
+    merged_at = (event_times[-1] if event_times else created_at) + timedelta(hours=1)
+    return {
+        "id": f"PR_{number}",
+        "author": {"login": author},
+        "url": f"https://github.com/{ORGANIZATION}/{REPO_NAME}/pull/{number}",
+        "createdAt": timestamp(created_at),
+        "updatedAt": timestamp(merged_at),
+        "isDraft": state == "OPEN" and rng.random() < 0.2,
+        "changedFiles": rng.randint(1, 30),
+        "mergedBy": {"login": rng.choice(TIER2)} if state == "MERGED" else None,
+        "mergedAt": timestamp(merged_at) if state == "MERGED" else None,
+        "state": state,
+        "additions": rng.randint(1, 1000),
+        "deletions": rng.randint(0, 500),
+        "timelineItems": {
+            "totalCount": len(events),
+            "pageInfo": {"endCursor": None, "hasNextPage": False},
+            "nodes": events,
+        },
+    }
+
+
+def synthetic_responses(pr_count, seed=0):
+    """Fixture responses for the synthetic repo, see replay_transport.write_fixture"""
+    rng = random.Random(seed)
+    registry.configure(validate=False)
+    responses = {}
+
+    def add(document, variable_values, data):
+        data = {**data, "rateLimit": RATE_LIMIT}
+        responses[fixture_key(document, variable_values)] = fixture_response(
+            document, variable_values, data
+        )
+
+    for slug, members in (("tier-1", TIER1), ("tier-2", TIER2)):
+        add(
+            registry.document(review_teams_query.team_members_query),
+            {"organization": ORGANIZATION, "team": slug, "membersCursor": None},
+            {
+                "organization": {
+                    "team": {
+                        "name": slug,
+                        "members": {
+                            "pageInfo": {"endCursor": None, "hasNextPage": False},
+                            "nodes": [{"login": m} for m in members],
+                        },
+                    }
+                }
+            },
+        )
+
+    # newest PR first, one every few hours back from now
+    created_at = datetime.utcnow().replace(microsecond=0)
+    pr_nodes = []
+    for number in range(pr_count, 0, -1):
+        created_at -= timedelta(minutes=rng.randint(10, 600))
+        pr_nodes.append(synthetic_pr_node(rng, number, created_at))
+
+    pr_document = registry.document(pr_query.pr_review_query)
+    cursor = None
+    for page_start in range(0, pr_count, PAGE_SIZE):
+        page_nodes = pr_nodes[page_start:][:PAGE_SIZE]
+        end_cursor = f"cursor-{page_start + len(page_nodes)}"
+        add(
+            pr_document,
+            {
+                "prCursor": cursor,
+                "owner": ORGANIZATION,
+                "name": REPO_NAME,
+                "orderField": "CREATED_AT",
+            },
+            {
+                "repository": {
+                    "pullRequests": {
+                        "nodes": page_nodes,
+                        "pageInfo": {
+                            "endCursor": end_cursor,
+                            "hasNextPage": page_start + PAGE_SIZE < pr_count,
+                        },
+                    }
+                }
+            },
+        )
+        cursor = end_cursor
+    return responses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixture_path")
+    parser.add_argument("--pr-count", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_fixture(args.fixture_path, synthetic_responses(args.pr_count, args.seed))
+    print(f"Wrote {args.pr_count} synthetic PRs to {args.fixture_path}")
+
+
+if __name__ == "__main__":
+    main()
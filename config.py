@@ -1,10 +1,19 @@
 from pathlib import Path
 
-from dynaconf import Dynaconf
-
-settings = Dynaconf(
-    envvar_prefix="METRICS", settings_files=["settings.yaml", ".secrets.yaml"],
-)
-
 METRICS_DIR = Path()
 METRICS_OUTPUT = METRICS_DIR.joinpath("metrics_output")
+METRICS_CACHE = METRICS_DIR.joinpath("metrics_cache")
+
+
+def __getattr__(name):
+    """Create settings on first use, importing dynaconf only when a command needs them"""
+    if name != "settings":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from dynaconf import Dynaconf
+
+    global settings
+    settings = Dynaconf(
+        envvar_prefix="METRICS",
+        settings_files=["settings.yaml", ".secrets.yaml"],
+    )
+    return settings
@@ -1,33 +1,212 @@
+# the settings, tabulate and the utils modules are imported where they're used,
+# so --help and shell completion start without them, see benchmarks.bench_cli_startup
+import functools
 from datetime import datetime
 from pathlib import Path
 
 import click
-from tabulate import multiline_formats
-from tabulate import tabulate
 
+from config import METRICS_CACHE
 from config import METRICS_OUTPUT
-from config import settings
-from utils import file_io
-from utils import metrics_calculators
-from utils.GQL_Queries.github_wrappers import OrgWrapper
-
 
 # keys that will be read from settings files (dynaconf parsing) for command input defaults
 SETTINGS_OUTPUT_PREFIX = "output_file_prefix"
 SETTINGS_REVIEWER_TEAMS = "reviewer_teams"
+SETTINGS_CACHE_DIR = "cache_dir"
+SETTINGS_CONCURRENCY = "concurrency"
+SETTINGS_GQL_VALIDATE = "gql_validate"
+SETTINGS_GQL_SCHEMA_PATH = "gql_schema_path"
+SETTINGS_METRICS_ENGINE = "metrics_engine"
+SETTINGS_TEAM_CACHE_TTL = "team_cache_ttl_hours"
+SETTINGS_OUTPUT_FORMAT = "output_format"
+SETTINGS_SERVE_PORT = "serve_port"
+SETTINGS_REFRESH_MINUTES = "refresh_minutes"
+
+# tabulate.multiline_formats, and metrics_calculators.ENGINES, for the option choices
+TABLE_FORMATS = [
+    "plain",
+    "simple",
+    "grid",
+    "simple_grid",
+    "rounded_grid",
+    "heavy_grid",
+    "mixed_grid",
+    "double_grid",
+    "fancy_grid",
+    "colon_grid",
+    "pipe",
+    "orgtbl",
+    "jira",
+    "presto",
+    "pretty",
+    "psql",
+    "rst",
+    "github",
+    "outline",
+    "simple_outline",
+    "rounded_outline",
+    "heavy_outline",
+    "mixed_outline",
+    "double_outline",
+    "fancy_outline",
+]
+METRICS_ENGINES = ["python", "columnar"]
+# html tables, or the typed records of utils.exports.SUFFIXES
+OUTPUT_FORMATS = ["html", "jsonl", "csv", "parquet", "arrow"]
+
+
+def settings_default(key, default):
+    """Option default from the settings files, read only when a command runs"""
+
+    def default_from_settings():
+        from config import settings
+
+        return settings.get(key, default)
+
+    return default_from_settings
 
 
 # parent click group for report and graph commands
 @click.group()
-def report():
-    pass
+@click.option(
+    "--cache-dir",
+    default=None,
+    type=click.Path(file_okay=False),
+    help="Directory for the local cache of fetched PR data, only PRs updated since "
+    "the last run are fetched from GitHub. Also holds the weekly reviewer action rollup, "
+    f"and the reviewer team members. Defaults to {METRICS_CACHE}, can be set in settings",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help="Fetch all PR data and reviewer teams from GitHub, without reading or updating "
+    "the local cache or the reviewer rollup",
+)
+@click.option(
+    "--validate/--no-validate",
+    default=None,
+    help="Validate queries against the local GitHub schema snapshot before sending them, "
+    "warning when there's no snapshot. By default they're validated when there is one, "
+    "unless disabled in settings",
+)
+@click.option(
+    "--record",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Save the GitHub responses to this fixture file (.json.gz), for --replay",
+)
+@click.option(
+    "--replay",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Answer queries from this fixture file instead of GitHub, no token needed. "
+    "Combine with --no-cache, so the same queries are made as when recording",
+)
+@click.option(
+    "--output-format",
+    default=settings_default(SETTINGS_OUTPUT_FORMAT, "html"),
+    type=click.Choice(OUTPUT_FORMATS),
+    help="Format of the report files, html tables, or typed records for loading "
+    "elsewhere, parquet and arrow need pyarrow (pip install -e .[export])",
+)
+@click.pass_context
+def report(ctx, cache_dir, no_cache, validate, record, replay, output_format):
+    if record and replay:
+        raise click.UsageError("--record and --replay can't be used together")
+    # only kept here, the commands configure the run with them, see pass_run
+    ctx.obj = {
+        "cache_dir": cache_dir,
+        "no_cache": no_cache,
+        "validate": validate,
+        "record": record,
+        "replay": replay,
+        "output_format": output_format,
+    }
+
+
+def configure_run(cache_dir, no_cache, validate, record, replay):
+    """Configure the GQL client and team cache from the report group's options
+
+    Returns:
+        dict with the run's pr_cache and rollup, None with no_cache
+    """
+    from config import settings
+    from utils.GQL_Queries.github_wrappers import GQLClient
+    from utils.GQL_Queries.github_wrappers import RepoWrapper
+    from utils.pr_cache import PRNodeCache
+    from utils.reviewer_rollup import ReviewerRollup
+    from utils.team_cache import DEFAULT_TTL_HOURS
+    from utils.team_cache import TeamMembersCache
+
+    if cache_dir is None:
+        cache_dir = settings.get(SETTINGS_CACHE_DIR, str(METRICS_CACHE))
+    if validate is None:
+        validate = settings.get(SETTINGS_GQL_VALIDATE, None)
+    GQLClient.configure(
+        validate=validate,
+        schema_path=schema_snapshot_path(cache_dir),
+        record_path=record,
+        replay_path=replay,
+    )
+    RepoWrapper.team_cache = (
+        None
+        if no_cache
+        else TeamMembersCache(
+            cache_dir=cache_dir,
+            ttl_hours=settings.get(SETTINGS_TEAM_CACHE_TTL, DEFAULT_TTL_HOURS),
+        )
+    )
+    return {
+        "pr_cache": None if no_cache else PRNodeCache(cache_dir=cache_dir),
+        "rollup": None if no_cache else ReviewerRollup(cache_dir=cache_dir),
+    }
+
+
+def schema_snapshot_path(cache_dir=None):
+    """The GQL schema snapshot from settings, or the one in the cache dir"""
+    from config import settings
+    from utils.GQL_Queries.schema import SCHEMA_FILE_NAME
+
+    if cache_dir is None:
+        cache_dir = settings.get(SETTINGS_CACHE_DIR, str(METRICS_CACHE))
+    return Path(
+        settings.get(SETTINGS_GQL_SCHEMA_PATH) or Path(cache_dir, SCHEMA_FILE_NAME)
+    )
+
+
+def pass_run(command):
+    """Like click.pass_obj, passing the configure_run dict for the report group's options,
+    with the OutputWriter for the command's output files as 'writer'
+
+    So the run is only configured when a command runs, not for --help
+    """
+
+    @click.pass_obj
+    @functools.wraps(command)
+    def run_command(obj, *args, **kwargs):
+        from utils.file_io import OutputWriter
+        from utils.GQL_Queries.github_wrappers import ReviewerTeamsError
+
+        run_options = dict(obj)
+        output_format = run_options.pop("output_format")
+        # output files are written in the background, and all written when the command ends
+        try:
+            with OutputWriter(output_format=output_format) as writer:
+                return command(
+                    {**configure_run(**run_options), "writer": writer}, *args, **kwargs
+                )
+        except ReviewerTeamsError as err:
+            raise click.ClickException(str(err))
+
+    return run_command
 
 
 # reused options for multiple metrics functions
 # TODO read defaults from settings
 output_prefix_option = click.option(
     "--output-file-prefix",
-    default=settings.get(SETTINGS_OUTPUT_PREFIX, "metrics-report"),
+    default=settings_default(SETTINGS_OUTPUT_PREFIX, "metrics-report"),
     help="Will only take file name (with or without extension), but not a full path."
     "Will append the metric name an epoch timestamp to the file name.",
 )
@@ -68,10 +247,267 @@ num_weeks_option = click.option(
 table_format_option = click.option(
     "--table-format",
     default="fancy_grid",
-    type=click.Choice(multiline_formats),
+    type=click.Choice(TABLE_FORMATS),
     help="The tabulate output format, https://github.com/astanin/python-tabulate#multiline-cells",
 )
 
+since_option = click.option(
+    "--since",
+    default=None,
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Only include PRs created (or merged, see --date-qualifier) on or after this date, "
+    "instead of the latest --pr-count PRs",
+)
+until_option = click.option(
+    "--until",
+    default=None,
+    type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Only include PRs created (or merged, see --date-qualifier) on or before this date, "
+    "instead of the latest --pr-count PRs",
+)
+date_qualifier_option = click.option(
+    "--date-qualifier",
+    default="created",
+    type=click.Choice(["created", "merged"]),
+    help="Which PR date --since and --until apply to",
+)
+concurrency_option = click.option(
+    "--concurrency",
+    default=settings_default(SETTINGS_CONCURRENCY, 4),
+    type=click.IntRange(min=1),
+    help="Maximum number of repositories to collect metrics for in parallel",
+)
+engine_option = click.option(
+    "--engine",
+    default=settings_default(SETTINGS_METRICS_ENGINE, "python"),
+    type=click.Choice(METRICS_ENGINES),
+    help="How PR metrics are calculated, columnar is faster for thousands of PRs, "
+    "and needs numpy (pip install -e .[fast])",
+)
+
+
+def pr_window_from_options(since, until, date_qualifier):
+    """PRWindow for the --since/--until options, None when neither was given"""
+    from utils.GQL_Queries.github_wrappers import PRWindow
+
+    if since is None and until is None:
+        return None
+    return PRWindow(since=since, until=until, qualifier=date_qualifier)
+
+
+def report_table(table, **format_kwargs):
+    """ReportTable for a list of dicts, formatted once for echo_table and write_report_table"""
+    from utils.report_tables import ReportTable
+
+    return ReportTable.from_dicts(table, **format_kwargs)
+
+
+def echo_table(header, table, table_format):
+    """Echo a ReportTable under a boxed header"""
+    click.echo(f"\n{'-' * len(header)}")
+    click.echo(header)
+    click.echo("-" * len(header))
+    click.echo(table.render(table_format))
+
+
+def write_report_table(writer, filename, description, table, records):
+    """Write a ReportTable as HTML, or its records in the writer's output_format
+
+    Rendered and written in the writer's pool, records is a callable returning
+    the table's typed records, see utils.exports, only called for the other formats
+    """
+    output_format = writer.output_format
+    if output_format == "html":
+        click.echo(f"\nWriting {description} as HTML to {filename}")
+        writer.write(filename, lambda: table.render("html"))
+        return
+
+    from utils import exports
+
+    filename = filename.with_suffix(exports.SUFFIXES[output_format])
+    collected_at = datetime.now().replace(microsecond=0)
+    click.echo(f"\nWriting {description} as {output_format} to {filename}")
+    writer.write(
+        filename,
+        lambda: exports.render_records(
+            [{"collected_at": collected_at, **r} for r in records()], output_format
+        ),
+    )
+
+
+def report_filename(output_file_prefix, *name_parts):
+    """Output file for a report, like prefix-SatelliteQE-robottelo-pr_metrics-<time>.html"""
+    return METRICS_OUTPUT.joinpath(
+        f"{Path(output_file_prefix).stem}-"
+        + "".join(f"{part}-" for part in name_parts)
+        + f"{datetime.now().isoformat(timespec='minutes')}.html"
+    )
+
+
+def output_pr_reports(
+    writer, org, repo_name, output_file_prefix, pr_metrics, stat_metrics, table_format
+):
+    from utils import exports
+
+    pr_table = report_table(pr_metrics, floatfmt=".1f")
+    stat_table = report_table(stat_metrics, floatfmt=".1f")
+    echo_table(
+        f"Review Metrics By PR for [{repo_name}]",
+        pr_table,
+        table_format,
+    )
+    echo_table(
+        f"Review Metric Statistics for [{repo_name}]",
+        stat_table,
+        table_format,
+    )
+    write_report_table(
+        writer,
+        report_filename(output_file_prefix, org, repo_name, "pr_metrics"),
+        "PR metrics",
+        pr_table,
+        lambda: exports.pr_metric_records(org, repo_name, pr_metrics),
+    )
+    write_report_table(
+        writer,
+        report_filename(output_file_prefix, org, repo_name, "stat_metrics"),
+        "statistics metrics",
+        stat_table,
+        lambda: [
+            exports.typed_record(row, org=org, repo=repo_name) for row in stat_metrics
+        ],
+    )
+
+
+def output_org_percentiles(
+    writer, org, output_file_prefix, repo_sketches, table_format
+):
+    """Org-wide latency percentiles, from the merged per-repo sketches"""
+    from utils import exports
+    from utils import metrics_calculators
+
+    percentiles = metrics_calculators.percentile_rows(
+        metrics_calculators.merge_latency_sketches(repo_sketches)
+    )
+    percentile_table = report_table(percentiles, floatfmt=".1f")
+    echo_table(
+        f"Review Latency Percentiles for [{org}]",
+        percentile_table,
+        table_format,
+    )
+    write_report_table(
+        writer,
+        report_filename(output_file_prefix, org, "percentile_metrics"),
+        "org-wide percentiles",
+        percentile_table,
+        lambda: [exports.typed_record(row, org=org) for row in percentiles],
+    )
+
+
+def output_reviewer_reports(
+    writer, org, repo_name, output_file_prefix, t1_metrics, t2_metrics, table_format
+):
+    from utils import exports
+
+    t1_table = report_table(t1_metrics)
+    t2_table = report_table(t2_metrics)
+    echo_table(
+        f"Tier1 Reviewer actions by week for [{repo_name}]", t1_table, table_format
+    )
+    echo_table(
+        f"Tier2 Reviewer actions by week for [{repo_name}]", t2_table, table_format
+    )
+    write_report_table(
+        writer,
+        report_filename(output_file_prefix, org, repo_name, "tier1_reviewers"),
+        "PR metrics",
+        t1_table,
+        lambda: exports.reviewer_records(org, repo_name, "tier1", t1_metrics),
+    )
+    write_report_table(
+        writer,
+        report_filename(output_file_prefix, org, repo_name, "tier2_reviewers"),
+        "PR metrics",
+        t2_table,
+        lambda: exports.reviewer_records(org, repo_name, "tier2", t2_metrics),
+    )
+
+
+def output_org_reviewer_reports(
+    writer, org, output_file_prefix, t1_metrics, t2_metrics, breakdown, table_format
+):
+    """Reviewer actions combined across the org's repos, and each repo's counts"""
+    output_reviewer_reports(
+        writer, org, org, output_file_prefix, t1_metrics, t2_metrics, table_format
+    )
+    from utils import exports
+
+    breakdown_table = report_table(breakdown)
+    echo_table(
+        f"Reviewer actions by repository for [{org}]", breakdown_table, table_format
+    )
+    write_report_table(
+        writer,
+        report_filename(output_file_prefix, org, "repo_reviewers"),
+        "reviewer actions by repository",
+        breakdown_table,
+        lambda: [exports.typed_record(row, org=org) for row in breakdown],
+    )
+
+
+def collect_contributor_counts(org, team, user, num_weeks):
+    """Contribution counts for the teams' members and the users, keyed on login
+
+    Collected per team in bulk, then any given users not already covered by a team
+    """
+    from utils import metrics_calculators
+
+    collected_counts = {}
+
+    for team_name in team:
+        click.echo(f"Retrieving metrics for team: {org}/{team_name}")
+        team_counts = metrics_calculators.team_contributor_actions(
+            organization=org, team=team_name, num_weeks=num_weeks
+        )
+        click.echo(f"Team members for {org}/{team_name}:\n" + "\n".join(team_counts))
+        for member, member_counts in team_counts.items():
+            if member in collected_counts:
+                click.echo(f"Skipping user (member of multiple teams): {member}")
+                continue
+            collected_counts[member] = member_counts
+
+    for user_name in user:
+        if user_name in collected_counts:
+            click.echo(f"Skipping user (already collected with a team): {user_name}")
+            continue
+        click.echo(f"Retrieving metrics for user: {user_name}")
+        collected_counts[user_name] = metrics_calculators.contributor_actions(
+            user=user_name, num_weeks=num_weeks
+        )
+    return collected_counts
+
+
+def output_contributor_reports(
+    writer, output_file_prefix, collected_counts, table_format
+):
+    from utils import exports
+    from utils import metrics_calculators
+
+    for user, contributor_counts in collected_counts.items():
+        contributor_table = report_table(
+            metrics_calculators.contribution_table(contributor_counts)
+        )
+        echo_table(
+            f"Contributions by week for [{user}]", contributor_table, table_format
+        )
+        write_report_table(
+            writer,
+            report_filename(output_file_prefix, user, "contributor"),
+            "contributor metrics",
+            contributor_table,
+            functools.partial(exports.contributor_records, user, contributor_counts),
+        )
+
 
 @report.command(
     "pr-report",
@@ -81,57 +517,58 @@ table_format_option = click.option(
 @repo_name_option
 @output_prefix_option
 @pr_count_option
+@since_option
+@until_option
+@date_qualifier_option
 @table_format_option
-def repo_pr_metrics(org, repo, output_file_prefix, pr_count, table_format):
-    for repo_name in repo:
-        click.echo(f"Collecting metrics for {org}/{repo_name} ...")
-
-        pr_metrics, stat_metrics = metrics_calculators.single_pr_metrics(
-            organization=org, repository=repo_name, pr_count=pr_count
-        )
-
-        header = f"Review Metrics By PR for [{repo_name}]"
-        click.echo(f"\n{'-' * len(header)}")
-        click.echo(header)
-        click.echo("-" * len(header))
-        click.echo(
-            tabulate(pr_metrics, headers="keys", tablefmt=table_format, floatfmt=".1f")
-        )
-
-        header = f"Review Metric Statistics for [{repo_name}]"
-        click.echo(f"\n{'-' * len(header)}")
-        click.echo(header)
-        click.echo("-" * len(header))
-        click.echo(
-            tabulate(
-                stat_metrics, headers="keys", tablefmt=table_format, floatfmt=".1f"
-            )
+@concurrency_option
+@engine_option
+@pass_run
+def repo_pr_metrics(
+    obj,
+    org,
+    repo,
+    output_file_prefix,
+    pr_count,
+    since,
+    until,
+    date_qualifier,
+    table_format,
+    concurrency,
+    engine,
+):
+    from utils import metrics_calculators
+
+    click.echo(f"Collecting metrics for {', '.join(f'{org}/{r}' for r in repo)} ...")
+    repo_sketches = []
+    for repo_name, (
+        pr_metrics,
+        stat_metrics,
+        sketches,
+    ) in metrics_calculators.metrics_by_repo(
+        metrics_calculators.single_pr_metrics,
+        repositories=repo,
+        concurrency=concurrency,
+        organization=org,
+        pr_count=pr_count,
+        pr_cache=obj["pr_cache"],
+        pr_window=pr_window_from_options(since, until, date_qualifier),
+        engine=engine,
+    ):
+        output_pr_reports(
+            obj["writer"],
+            org,
+            repo_name,
+            output_file_prefix,
+            pr_metrics,
+            stat_metrics,
+            table_format,
         )
+        repo_sketches.append(sketches)
 
-        pr_metrics_filename = METRICS_OUTPUT.joinpath(
-            f"{Path(output_file_prefix).stem}-"
-            f"{org}-"
-            f"{repo_name}-"
-            "pr_metrics-"
-            f"{datetime.now().isoformat(timespec='minutes')}.html"
-        )
-        click.echo(f"\nWriting PR metrics as HTML to {pr_metrics_filename}")
-        file_io.write_to_output(
-            pr_metrics_filename,
-            tabulate(pr_metrics, headers="keys", tablefmt="html", floatfmt=".1f"),
-        )
-
-        stat_metrics_filename = METRICS_OUTPUT.joinpath(
-            f"{Path(output_file_prefix).stem}-"
-            f"{org}-"
-            f"{repo_name}-"
-            "stat_metrics-"
-            f"{datetime.now().isoformat(timespec='minutes')}.html"
-        )
-        click.echo(f"\nWriting statistics metrics as HTML to {stat_metrics_filename}")
-        file_io.write_to_output(
-            stat_metrics_filename,
-            tabulate(stat_metrics, headers="keys", tablefmt="html", floatfmt=".1f"),
+    if len(repo) > 1:
+        output_org_percentiles(
+            obj["writer"], org, output_file_prefix, repo_sketches, table_format
         )
 
 
@@ -142,56 +579,99 @@ def repo_pr_metrics(org, repo, output_file_prefix, pr_count, table_format):
 @repo_name_option
 @output_prefix_option
 @pr_count_option
+@since_option
+@until_option
+@date_qualifier_option
 @table_format_option
-def reviewer_actions(org, repo, output_file_prefix, pr_count, table_format):
+@concurrency_option
+@click.option(
+    "--rollup-weeks",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Report the last N weeks from the local reviewer rollup, "
+    "instead of the weeks of the fetched PRs",
+)
+@click.option(
+    "--no-fetch",
+    is_flag=True,
+    default=False,
+    help="Report from the local reviewer rollup only, without fetching PRs",
+)
+@click.option(
+    "--all-repos",
+    is_flag=True,
+    default=False,
+    help="Report the reviewer load across all of the org's repos with reviewer teams, "
+    "instead of --repo",
+)
+@pass_run
+def reviewer_actions(
+    obj,
+    org,
+    repo,
+    output_file_prefix,
+    pr_count,
+    since,
+    until,
+    date_qualifier,
+    table_format,
+    concurrency,
+    rollup_weeks,
+    no_fetch,
+    all_repos,
+):
     """ Generate metrics for tier reviewer groups, and general contributors
 
     Will collect tier reviewer teams from the github org
     Tier reviewer teams will read from settings file, and default to what SatelliteQE uses
 
     """
-    for repo_name in repo:
-        click.echo(f"Collecting metrics for {org}/{repo_name} ...")
+    from utils import metrics_calculators
 
-        t1_metrics, t2_metrics = metrics_calculators.reviewer_actions(
-            organization=org, repository=repo_name, pr_count=pr_count
+    if (no_fetch or rollup_weeks) and obj["rollup"] is None:
+        raise click.UsageError(
+            "--no-fetch and --rollup-weeks need the local cache, not --no-cache"
         )
-        header = f"Tier1 Reviewer actions by week for [{repo_name}]"
-        click.echo(f"\n{'-' * len(header)}")
-        click.echo(header)
-        click.echo("-" * len(header))
-        click.echo(tabulate(t1_metrics, headers="keys", tablefmt=table_format))
-
-        header = f"Tier2 Reviewer actions by week for [{repo_name}]"
-        click.echo(f"\n{'-' * len(header)}")
-        click.echo(header)
-        click.echo("-" * len(header))
-        click.echo(tabulate(t2_metrics, headers="keys", tablefmt=table_format))
-
-        tier1_metrics_filename = METRICS_OUTPUT.joinpath(
-            f"{Path(output_file_prefix).stem}-"
-            f"{org}-"
-            f"{repo_name}-"
-            "tier1_reviewers-"
-            f"{datetime.now().isoformat(timespec='minutes')}.html"
+    if all_repos:
+        click.echo(f"Collecting metrics for all repositories of {org} ...")
+        output_org_reviewer_reports(
+            obj["writer"],
+            org,
+            output_file_prefix,
+            *metrics_calculators.org_reviewer_actions(
+                organization=org,
+                pr_count=pr_count,
+                pr_cache=obj["pr_cache"],
+                pr_window=pr_window_from_options(since, until, date_qualifier),
+                rollup=obj["rollup"],
+                rollup_weeks=rollup_weeks,
+                fetch=not no_fetch,
+                concurrency=concurrency,
+            ),
+            table_format,
         )
-        click.echo(f"\nWriting PR metrics as HTML to {tier1_metrics_filename}")
-        file_io.write_to_output(
-            tier1_metrics_filename,
-            tabulate(t1_metrics, headers="keys", tablefmt="html"),
-        )
-
-        tier2_metrics_filename = METRICS_OUTPUT.joinpath(
-            f"{Path(output_file_prefix).stem}-"
-            f"{org}-"
-            f"{repo_name}-"
-            "tier2_reviewers-"
-            f"{datetime.now().isoformat(timespec='minutes')}.html"
-        )
-        click.echo(f"\nWriting PR metrics as HTML to {tier2_metrics_filename}")
-        file_io.write_to_output(
-            tier2_metrics_filename,
-            tabulate(t2_metrics, headers="keys", tablefmt="html"),
+        return
+    click.echo(f"Collecting metrics for {', '.join(f'{org}/{r}' for r in repo)} ...")
+    for repo_name, (t1_metrics, t2_metrics) in metrics_calculators.metrics_by_repo(
+        metrics_calculators.reviewer_actions,
+        repositories=repo,
+        concurrency=concurrency,
+        organization=org,
+        pr_count=pr_count,
+        pr_cache=obj["pr_cache"],
+        pr_window=pr_window_from_options(since, until, date_qualifier),
+        rollup=obj["rollup"],
+        rollup_weeks=rollup_weeks,
+        fetch=not no_fetch,
+    ):
+        output_reviewer_reports(
+            obj["writer"],
+            org,
+            repo_name,
+            output_file_prefix,
+            t1_metrics,
+            t2_metrics,
+            table_format,
         )
 
 
@@ -202,51 +682,262 @@ def reviewer_actions(org, repo, output_file_prefix, pr_count, table_format):
 @num_weeks_option
 @table_format_option
 @user_name_option
-def contributor_actions(org, output_file_prefix, team, num_weeks, table_format, user):
+@pass_run
+def contributor_actions(
+    obj, org, output_file_prefix, team, num_weeks, table_format, user
+):
     """Collect count metrics of various contribution types"""
 
-    orgwrap = OrgWrapper(name=org)
-
-    collected_users = []
-
     if not (user or team):
         click.echo("ERROR: Need to specify either a team and/or user")
 
-    collaborators = list(user)  # might be empty, we're gonna add users from the team(s)
+    output_contributor_reports(
+        obj["writer"],
+        output_file_prefix,
+        collect_contributor_counts(org, team, user, num_weeks),
+        table_format,
+    )
 
-    for team_name in team:
-        # Assert the team exists and list its members
-        team_members = orgwrap.team_members(team=team_name)
-        click.echo(f"Team members for {org}/{team_name}:\n" + "\n".join(team_members))
-        collaborators.extend(team_members)
-
-    # maybe drop this into an OrgWrapper function
-    # replacing the function label here in the loop
-    for user in collaborators:
-        if user not in collected_users:
-            click.echo(f"Retrieving metrics for user: {user}")
-            collected_users.append(user)
-        else:
-            click.echo(f"Skipping user (member of multiple teams): {user}")
-        # collect metrics for the given user if not already covered by another team
-        contributor_counts = metrics_calculators.contributor_actions(
-            user=user, num_weeks=num_weeks
-        )
-
-        header = f"Contributions by week for [{user}]"
-        click.echo(f"\n{'-' * len(header)}")
-        click.echo(header)
-        click.echo("-" * len(header))
-        click.echo(tabulate(contributor_counts, tablefmt=table_format, headers="keys"))
-
-        user_metrics_filename = METRICS_OUTPUT.joinpath(
-            f"{Path(output_file_prefix).stem}-"
-            f"{user}-"
-            "contributor-"
-            f"{datetime.now().isoformat(timespec='minutes')}.html"
-        )
-        click.echo(f"\nWriting contributor metrics as HTML to {user_metrics_filename}")
-        file_io.write_to_output(
-            user_metrics_filename,
-            tabulate(contributor_counts, headers="keys", tablefmt="html"),
+
+@report.command(
+    "all-reports",
+    help="Run pr-report and reviewer-report (and contributor-report, with --team or "
+    "--user) together, fetching each repo's PRs only once",
+)
+@org_name_option
+@repo_name_option
+@output_prefix_option
+@pr_count_option
+@since_option
+@until_option
+@date_qualifier_option
+@table_format_option
+@concurrency_option
+@engine_option
+@team_name_option
+@user_name_option
+@num_weeks_option
+@pass_run
+def all_reports(
+    obj,
+    org,
+    repo,
+    output_file_prefix,
+    pr_count,
+    since,
+    until,
+    date_qualifier,
+    table_format,
+    concurrency,
+    engine,
+    team,
+    user,
+    num_weeks,
+):
+    from utils import metrics_calculators
+
+    click.echo(f"Collecting metrics for {', '.join(f'{org}/{r}' for r in repo)} ...")
+    repo_sketches = []
+    for repo_name, (pr_tables, reviewer_tables) in metrics_calculators.metrics_by_repo(
+        metrics_calculators.all_repo_metrics,
+        repositories=repo,
+        concurrency=concurrency,
+        organization=org,
+        pr_count=pr_count,
+        pr_cache=obj["pr_cache"],
+        pr_window=pr_window_from_options(since, until, date_qualifier),
+        engine=engine,
+        rollup=obj["rollup"],
+    ):
+        pr_metrics, stat_metrics, sketches = pr_tables
+        output_pr_reports(
+            obj["writer"],
+            org,
+            repo_name,
+            output_file_prefix,
+            pr_metrics,
+            stat_metrics,
+            table_format,
+        )
+        output_reviewer_reports(
+            obj["writer"],
+            org,
+            repo_name,
+            output_file_prefix,
+            *reviewer_tables,
+            table_format,
         )
+        repo_sketches.append(sketches)
+
+    if len(repo) > 1:
+        output_org_percentiles(
+            obj["writer"], org, output_file_prefix, repo_sketches, table_format
+        )
+
+    # contributions come from each user's contribution counts, not the repos' PRs
+    if team or user:
+        output_contributor_reports(
+            obj["writer"],
+            output_file_prefix,
+            collect_contributor_counts(org, team, user, num_weeks),
+            table_format,
+        )
+
+
+def collect_served_tables(
+    obj, review_metrics, org, repo, pr_count, concurrency, engine, team, user, num_weeks
+):
+    """The serve command's report tables, keyed on their path, and its /metrics
+
+    Like all-reports, repos are collected concurrency at a time, each from one fetch of
+    its PRs, and only the PRs changed since the last refresh are fetched with the cache.
+    The PRs' rows update the ReviewMetricsState the /metrics exposition is rendered from.
+    """
+    from utils import metrics_calculators
+    from utils import prometheus_exporter
+    from utils.GQL_Queries.github_wrappers import RepoWrapper
+    from utils.metrics_server import Resource
+
+    # team members are read again each refresh, from the team cache once its TTL allows
+    RepoWrapper.clear_team_members()
+
+    tables = {}
+    repo_sketches = []
+    for repo_name, (pr_tables, reviewer_tables) in metrics_calculators.metrics_by_repo(
+        metrics_calculators.all_repo_metrics,
+        repositories=repo,
+        concurrency=concurrency,
+        organization=org,
+        pr_count=pr_count,
+        pr_cache=obj["pr_cache"],
+        engine=engine,
+        rollup=obj["rollup"],
+    ):
+        pr_metrics, stat_metrics, sketches = pr_tables
+        t1_metrics, t2_metrics = reviewer_tables
+        repo_path = f"/repos/{org}/{repo_name}"
+        tables[f"{repo_path}/pr-metrics"] = pr_metrics
+        tables[f"{repo_path}/stat-metrics"] = stat_metrics
+        tables[f"{repo_path}/tier1-reviewers"] = t1_metrics
+        tables[f"{repo_path}/tier2-reviewers"] = t2_metrics
+        repo_sketches.append(sketches)
+        review_metrics.update(org, repo_name, pr_metrics)
+    tables["/metrics"] = Resource(
+        body=review_metrics.exposition().encode(),
+        content_type=prometheus_exporter.CONTENT_TYPE,
+    )
+
+    if len(repo) > 1:
+        tables[f"/orgs/{org}/percentiles"] = metrics_calculators.percentile_rows(
+            metrics_calculators.merge_latency_sketches(repo_sketches)
+        )
+    if team or user:
+        for login, contributor_counts in collect_contributor_counts(
+            org, team, user, num_weeks
+        ).items():
+            tables[f"/contributors/{login}"] = metrics_calculators.contribution_table(
+                contributor_counts
+            )
+    return tables
+
+
+@report.command(
+    "serve",
+    help="Keep the pr-report, reviewer-report and contributor-report tables in memory, "
+    "refreshed on a schedule, and serve them as JSON over HTTP, "
+    "with review latency metrics for prometheus at /metrics",
+)
+@org_name_option
+@repo_name_option
+@pr_count_option
+@concurrency_option
+@engine_option
+@team_name_option
+@user_name_option
+@num_weeks_option
+@click.option(
+    "--host", default="127.0.0.1", help="Address to listen on, only local by default"
+)
+@click.option(
+    "--port",
+    default=settings_default(SETTINGS_SERVE_PORT, 8080),
+    type=click.IntRange(0, 65535),
+    help="Port to listen on",
+)
+@click.option(
+    "--refresh-minutes",
+    default=settings_default(SETTINGS_REFRESH_MINUTES, 15),
+    type=click.FloatRange(min=0.1),
+    help="How often the tables are collected again, only changed PRs are fetched "
+    "unless --no-cache",
+)
+@pass_run
+def serve(
+    obj,
+    org,
+    repo,
+    pr_count,
+    concurrency,
+    engine,
+    team,
+    user,
+    num_weeks,
+    host,
+    port,
+    refresh_minutes,
+):
+    """Serve the report tables from memory
+
+    GET / lists the paths, each answered with an ETag, and 304 when If-None-Match has it
+    """
+    from utils.metrics_server import MetricsDataset
+    from utils.metrics_server import MetricsServer
+    from utils.metrics_server import Refresher
+    from utils.prometheus_exporter import ReviewMetricsState
+
+    dataset = MetricsDataset()
+    refresher = Refresher(
+        dataset=dataset,
+        collect=functools.partial(
+            collect_served_tables,
+            obj,
+            ReviewMetricsState(),
+            org,
+            repo,
+            pr_count,
+            concurrency,
+            engine,
+            team,
+            user,
+            num_weeks,
+        ),
+        interval=refresh_minutes * 60,
+    )
+    server = MetricsServer((host, port), dataset)
+    refresher.start()
+    click.echo(
+        f"Serving metrics for {', '.join(f'{org}/{r}' for r in repo)} on "
+        f"http://{host}:{server.server_port}/, refreshed every {refresh_minutes} minutes"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        refresher.stop()
+        server.server_close()
+
+
+@report.command(
+    "update-schema",
+    help="Download GitHub's current GQL schema as the local snapshot queries are "
+    "validated against",
+)
+@click.pass_obj
+def update_schema(obj):
+    from utils.GQL_Queries import schema
+
+    path = schema_snapshot_path(obj["cache_dir"])
+    click.echo(f"Current schema snapshot: {schema.schema_version(path) or 'none'}")
+    version = schema.update_schema(path)
+    click.echo(f"Wrote schema snapshot {version} to {path}")
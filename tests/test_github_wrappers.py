@@ -0,0 +1,58 @@
+from utils.GQL_Queries.github_wrappers import GHOST_LOGIN
+from utils.GQL_Queries.github_wrappers import RepoWrapper
+from utils.metrics_calculators import pr_review_row
+
+
+def pr_node(author, reviewer, merged_by):
+    """Raw PR node with a single review, logins of None like deleted accounts"""
+    return {
+        "id": "PR_1",
+        "author": author and {"login": author},
+        "url": "https://github.com/SatelliteQE/robottelo/pull/1",
+        "createdAt": "2021-03-01T10:00:00Z",
+        "updatedAt": "2021-03-02T10:00:00Z",
+        "isDraft": False,
+        "changedFiles": 1,
+        "mergedBy": merged_by and {"login": merged_by},
+        "mergedAt": "2021-03-02T10:00:00Z",
+        "state": "MERGED",
+        "additions": 1,
+        "deletions": 0,
+        "timelineItems": {
+            "totalCount": 1,
+            "pageInfo": {"endCursor": None, "hasNextPage": False},
+            "nodes": [
+                {
+                    "__typename": "PullRequestReview",
+                    "author": reviewer and {"login": reviewer},
+                    "state": "APPROVED",
+                    "createdAt": "2021-03-01T12:00:00Z",
+                    "comments": {"totalCount": 0},
+                }
+            ],
+        },
+    }
+
+
+def repo_wrapper():
+    repo = RepoWrapper("SatelliteQE", "robottelo")
+    # cached_property, so the teams aren't looked up on GitHub
+    repo.__dict__["reviewer_teams"] = {"tier1": ["tier1-reviewer"], "tier2": []}
+    return repo
+
+
+def test_null_author_review():
+    repo = repo_wrapper()
+    pr = repo.wrap_pr_node(pr_node("contributor", None, "tier1-reviewer"))
+    assert [e.author for e in pr.timeline_events] == [GHOST_LOGIN]
+    row = pr_review_row(pr)
+    assert row["Hours to Comment"] == 2.0
+    assert pr.reviews_by_non_tier == [GHOST_LOGIN]
+
+
+def test_null_pr_author_and_merger():
+    repo = repo_wrapper()
+    pr = repo.wrap_pr_node(pr_node(None, "tier1-reviewer", None))
+    assert pr.author == GHOST_LOGIN
+    assert pr.merged_by == GHOST_LOGIN
+    assert pr_review_row(pr)["Hours to Tier1"] == 2.0
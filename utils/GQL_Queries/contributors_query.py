@@ -12,6 +12,7 @@ org_team_members_query = """query orgTeamMembers($organization: String!, $team:
             }
         }
     }
+    rateLimit {cost remaining resetAt}
 }
 """  # noqa: E501
 
@@ -40,6 +41,86 @@ contributions_counts_by_user_query = """query getContributions($user: String! $f
 }
 """  # noqa: E501
 
+# contribution counts by repository, selected on each contributionsCollection alias below
+contribution_counts_fields = """
+      pullRequestContributionsByRepository {
+        repository {name}
+        contributions {totalCount}
+      }
+      pullRequestReviewContributionsByRepository {
+        repository {name}
+        contributions {totalCount}
+      }
+      issueContributionsByRepository {
+        repository {name}
+        contributions {totalCount}
+      }
+      commitContributionsByRepository {
+        repository {name}
+        contributions {totalCount}
+      }
+"""
+
+
+def contributions_counts_by_user_windows_query(window_count):
+    """Build a query for a user's contribution counts across multiple date windows
+
+    Each window is a contributionsCollection aliased as w0, w1, ... with its own
+    from_N/to_N DateTime variables, so many weeks are fetched in one request.
+    """
+    variables = ", ".join(
+        f"$from_{i}: DateTime!, $to_{i}: DateTime!" for i in range(window_count)
+    )
+    windows = "".join(
+        f"    w{i}: contributionsCollection (from: $from_{i}, to: $to_{i}) {{"
+        f"{contribution_counts_fields}"
+        "    }\n"
+        for i in range(window_count)
+    )
+    return (
+        f"query getContributionWindows($user: String!, {variables}) {{\n"
+        "  user(login:$user) {\n"
+        f"{windows}"
+        "  }\n"
+        "  rateLimit {cost remaining resetAt}\n"
+        "}\n"
+    )
+
+
+def contributions_counts_by_org_members_windows_query(window_count):
+    """Build a query for a page of team members' contribution counts across date windows
+
+    Like contributions_counts_by_user_windows_query, each member has a contributionsCollection
+    aliased as w0, w1, ... for each window, with its own from_N/to_N DateTime variables
+    """
+    variables = ", ".join(
+        f"$from_{i}: DateTime!, $to_{i}: DateTime!" for i in range(window_count)
+    )
+    windows = "".join(
+        f"          w{i}: contributionsCollection (from: $from_{i}, to: $to_{i}) {{"
+        f"{contribution_counts_fields}"
+        "          }\n"
+        for i in range(window_count)
+    )
+    return (
+        "query getTeamContributionWindows($organization: String!, $team: String!, "
+        f"$membersCursor: String, $membersCount: Int = 50, {variables}) {{\n"
+        "  organization(login: $organization) {\n"
+        "    team(slug: $team) {\n"
+        "      members (first: $membersCount, after: $membersCursor) {\n"
+        "        pageInfo {endCursor hasNextPage}\n"
+        "        nodes {\n"
+        "          login\n"
+        f"{windows}"
+        "        }\n"
+        "      }\n"
+        "    }\n"
+        "  }\n"
+        "  rateLimit {cost remaining resetAt}\n"
+        "}\n"
+    )
+
+
 contributions_by_org_members_query = """query getContributions ($organization: String!, $team: String!, $from_date: DateTime!, $to_date: DateTime!) {
   organization(login:$organization) {
     team(slug:$team) {
@@ -80,11 +161,12 @@ contributions_by_org_members_query = """query getContributions ($organization: S
 """  # noqa: E501
 
 contributions_counts_by_org_members_query = """
-query contributions_counts_by_org_members_query ($organization: String!, $team: String!, $from_date: DateTime!, $to_date: DateTime!) {
+query contributions_counts_by_org_members_query ($organization: String!, $team: String!, $from_date: DateTime!, $to_date: DateTime!, $membersCursor: String, $membersCount: Int = 50) {
     organization(login: $organization) {
         team(slug: $team) {
             name
-            members {
+            members (first: $membersCount, after: $membersCursor) {
+                pageInfo {endCursor hasNextPage}
                 nodes {
                     login
                     contributionsCollection (from: $from_date, to: $to_date) {
@@ -110,5 +192,19 @@ query contributions_counts_by_org_members_query ($organization: String!, $team:
             }
         }
     }
+    rateLimit {cost remaining resetAt}
 }
 """  # noqa: E501
+
+# the org's repositories that aren't archived, by name
+org_repositories_query = """query getOrgRepos($organization: String!, $repoCursor: String) {
+  organization(login: $organization) {
+    repositories(first: 100, after: $repoCursor, isArchived: false, orderBy: {field: NAME, direction: ASC}) {
+      pageInfo {endCursor hasNextPage}
+      nodes {
+        name
+      }
+    }
+  }
+  rateLimit {cost remaining resetAt}
+}"""  # noqa
@@ -1,41 +1,428 @@
+import atexit
+import queue
+import threading
+import time
 from collections import defaultdict
 from datetime import datetime
 from datetime import timedelta
+from sys import intern
 
 import attr
 from box import Box
 from cached_property import cached_property
 from gql import Client as GqlClient
-from gql import gql
+from gql.transport.exceptions import TransportQueryError
+from gql.transport.exceptions import TransportServerError
 from gql.transport.requests import RequestsHTTPTransport
 from logzero import logger
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import RequestException
+from requests.exceptions import Timeout
 
 from config import settings
 from utils.GQL_Queries import contributors_query
 from utils.GQL_Queries import pr_query
+from utils.GQL_Queries import registry
 from utils.GQL_Queries import review_teams_query
+from utils.GQL_Queries.replay_transport import RecordingTransport
+from utils.GQL_Queries.replay_transport import ReplayTransport
+from utils.GQL_Queries.schema import SCHEMA_PATH
+from utils.pr_cache import pr_number
+from utils.team_cache import members_fingerprint
 
-
-GH_TOKEN = settings.gh_token
 GH_GQL_URL = "https://api.github.com/graphql"
 GH_TS_FMT = "%Y-%m-%dT%H:%M:%SZ"
+GH_SEARCH_DATE_FMT = "%Y-%m-%d"
+GH_SEARCH_RESULT_LIMIT = 1000
 
 SECONDS_TO_HOURS = 3600
+GH_EPOCH = datetime(1970, 1, 1)  # naive UTC, like the parsed GH timestamps
+ONE_SECOND = timedelta(seconds=1)
+
+# request scheduling, see RequestScheduler and PageSizer
+GQL_TIMEOUT_SECONDS = 60
+GQL_POOL_SIZE = 10  # pooled connections, enough for the usual --concurrency
+GQL_PAGE_TARGET_SECONDS = 10
+GQL_PAGE_MAX_COST = 10
+GQL_MAX_RETRIES = 5
+GQL_RETRY_BACKOFF = 2  # base of the exponential backoff, in seconds
+GQL_RATE_LIMIT_WAIT_SECONDS = 60  # when rate limited before any resetAt was seen
+# GH answers secondary rate limits with 403
+GQL_RETRY_STATUS_CODES = (403, 429, 500, 502, 503, 504)
 
 WEEK_DELTA = timedelta(weeks=1)
+# contributionsCollection windows per query, keeps a year of weeks to a handful of requests
+CONTRIBUTION_WINDOWS_PER_QUERY = 13
+# PRs to follow timeline pagination for in each query
+TIMELINE_PRS_PER_QUERY = 20
+# repos to fetch the next page of PRs for in each query, see OrgWrapper.iter_repo_pr_pages
+REPOS_PER_QUERY = 10
+# reviewer_teams settings entry for the org's repos without their own entry
+DEFAULT_TEAMS_KEY = "default"
+# pseudo reviewers, counting the PRs opened and merged along with the tier actions
+OPENED = "opened"
+MERGED = "merged"
+# login GitHub shows for deleted accounts, their actor nodes are null
+GHOST_LOGIN = "ghost"
+PREFETCH_POLL_SECONDS = 0.1  # how often a blocked prefetch thread checks for a stop
 NOW = datetime.now()
 
 
+def prefetched(iterable, depth=1):
+    """Iterate in a background thread, running up to depth items ahead of the consumer
+
+    Exceptions from the iterable are raised to the consumer,
+    and the thread stops once the consumer closes the generator
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(item, error=None):
+        while not stop.is_set():
+            try:
+                items.put((item, error), timeout=PREFETCH_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except Exception as err:
+            put(done, err)
+        else:
+            put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def complete_timelines(gql_client, pr_nodes, prs_per_query=TIMELINE_PRS_PER_QUERY):
+    """Follow timelineItems pagination for PR nodes with more items than the first page
+
+    Remaining pages are fetched for multiple PRs in each query, by aliased node(id:),
+    and appended to the PR node's timeline nodes in place.
+
+    Args:
+        gql_client: GQLClient to query with
+        pr_nodes: list of raw PR nodes selecting pullRequestFields, from any repos
+        prs_per_query: maximum number of PRs to look up in a single query
+    """
+    incomplete = [n for n in pr_nodes if n["timelineItems"]["pageInfo"]["hasNextPage"]]
+    while incomplete:
+        batch = incomplete[:prs_per_query]
+        variable_values = {}
+        for i, pr_node in enumerate(batch):
+            variable_values[f"id_{i}"] = pr_node["id"]
+            variable_values[f"cursor_{i}"] = pr_node["timelineItems"]["pageInfo"][
+                "endCursor"
+            ]
+        gql_data = gql_client.execute(
+            registry.built_document(pr_query.pr_timeline_pages_query, len(batch)),
+            variable_values=variable_values,
+        )
+        for i, pr_node in enumerate(batch):
+            timeline_page = gql_data[f"p{i}"]["timelineItems"]
+            pr_node["timelineItems"]["nodes"].extend(timeline_page["nodes"])
+            pr_node["timelineItems"]["pageInfo"] = timeline_page["pageInfo"]
+        incomplete = [
+            n for n in incomplete if n["timelineItems"]["pageInfo"]["hasNextPage"]
+        ]
+
+
+def reviewer_team_slugs(organization, repo_name):
+    """The repo's tier1/tier2 team slugs from the reviewer_teams setting, None if there are none
+
+    Repos without their own entry use the org's DEFAULT_TEAMS_KEY entry, when there is one
+    """
+    org_teams = (settings.get("reviewer_teams") or {}).get(organization) or {}
+    return org_teams.get(repo_name) or org_teams.get(DEFAULT_TEAMS_KEY)
+
+
+def gh_timestamp(value):
+    """Epoch seconds for a GH timestamp string, like 2021-01-01T12:00:00Z
+
+    fromisoformat parses the fixed format many times faster than strptime with GH_TS_FMT
+    """
+    return (datetime.fromisoformat(value[:-1]) - GH_EPOCH) // ONE_SECOND
+
+
+def gh_datetime(timestamp):
+    """Naive UTC datetime for epoch seconds from gh_timestamp"""
+    return GH_EPOCH + timedelta(seconds=timestamp)
+
+
+@attr.s
+class PageSizer:
+    """Tune the page size of a paginated query from its latency and rate limit cost
+
+    Pages shrink when a query runs longer than target_seconds or costs more than max_cost,
+    and grow again while queries are well within both.
+    """
+
+    size = attr.ib(default=50)
+    minimum = attr.ib(default=1)
+    maximum = attr.ib(default=100)  # GH gql limits pages to 100 nodes
+    target_seconds = attr.ib(default=GQL_PAGE_TARGET_SECONDS)
+    max_cost = attr.ib(default=GQL_PAGE_MAX_COST)
+
+    def succeeded(self, seconds, cost):
+        if seconds > self.target_seconds or cost > self.max_cost:
+            ratio = min(self.target_seconds / seconds, self.max_cost / max(cost, 1))
+            self.size = max(self.minimum, int(self.size * ratio))
+        elif seconds < self.target_seconds / 2 and cost <= self.max_cost / 2:
+            self.size = min(self.maximum, int(self.size * 1.5) + 1)
+
+    def failed(self):
+        """Split the page after a failed query, False if it can't get any smaller"""
+        if self.size <= self.minimum:
+            return False
+        self.size = max(self.minimum, self.size // 2)
+        return True
+
+
+@attr.s
+class RequestScheduler:
+    """Execute GQL queries within GH's rate limit, shared by every GQLClient
+
+    Queries select rateLimit {cost remaining resetAt}, which is tracked here.
+    When the remaining points won't cover a query, it waits until the limit resets.
+    Server errors and timeouts are retried, splitting the page for paginated queries.
+    """
+
+    max_retries = attr.ib(default=GQL_MAX_RETRIES)
+    remaining = attr.ib(default=None)
+    reset_at = attr.ib(default=None)
+    _lock = attr.ib(factory=threading.Lock, repr=False)
+    _page_sizers = attr.ib(factory=dict, repr=False)
+    _costs = attr.ib(factory=dict, repr=False)
+
+    def page_sizer(self, operation):
+        """The PageSizer for the named query operation, shared between its callers"""
+        with self._lock:
+            return self._page_sizers.setdefault(operation, PageSizer())
+
+    def _wait_for_rate_limit(self, cost):
+        with self._lock:
+            if self.remaining is None or self.remaining >= cost:
+                return
+            if self.reset_at is None:
+                wait_seconds = GQL_RATE_LIMIT_WAIT_SECONDS
+            else:
+                wait_seconds = (self.reset_at - datetime.utcnow()).total_seconds() + 1
+            # assume the limit is reset after waiting, the next response will tell
+            self.remaining = None
+        if wait_seconds > 0:
+            logger.warning(
+                f"GitHub rate limit used up, waiting {wait_seconds:.0f}s for it to reset"
+            )
+            time.sleep(wait_seconds)
+
+    def _record_rate_limit(self, operation, rate_limit):
+        with self._lock:
+            self.remaining = rate_limit["remaining"]
+            self.reset_at = datetime.strptime(rate_limit["resetAt"], GH_TS_FMT)
+            self._costs[operation] = rate_limit["cost"]
+
+    def execute(
+        self,
+        gql_session,
+        document,
+        variable_values=None,
+        page_size_variable=None,
+        page_size_limit=None,
+    ):
+        """Execute the query document, waiting out the rate limit and retrying failures
+
+        Args:
+            gql_session: open gql session to execute the query with
+            document: parsed gql query document
+            variable_values: dict of query variables
+            page_size_variable: query variable for the page size of a paginated query,
+                set from the operation's PageSizer
+            page_size_limit: largest page size to use, like the number of nodes still needed
+        """
+        operation = document.definitions[0].name.value
+        variable_values = dict(variable_values or {})
+        page_sizer = self.page_sizer(operation) if page_size_variable else None
+        attempt = 0
+        while True:
+            if page_sizer is not None:
+                variable_values[page_size_variable] = min(
+                    page_sizer.size, page_size_limit or page_sizer.maximum
+                )
+            self._wait_for_rate_limit(self._costs.get(operation, 1))
+            started = time.monotonic()
+            try:
+                result = gql_session.execute(document, variable_values=variable_values)
+            except (TransportServerError, TransportQueryError, RequestException) as err:
+                attempt += 1
+                if attempt > self.max_retries or not self._retryable(err):
+                    raise
+                if self._rate_limited(err):
+                    with self._lock:
+                        self.remaining = 0
+                        if (
+                            self.reset_at is not None
+                            and self.reset_at < datetime.utcnow()
+                        ):
+                            self.reset_at = None  # stale, wait the default time instead
+                    self._wait_for_rate_limit(1)
+                elif page_sizer is not None and page_sizer.failed():
+                    logger.warning(
+                        f"{operation} failed ({err}), retrying with pages of "
+                        f"{page_sizer.size}"
+                    )
+                else:
+                    backoff = pow(GQL_RETRY_BACKOFF, attempt)
+                    logger.warning(
+                        f"{operation} failed ({err}), retrying in {backoff}s"
+                    )
+                    time.sleep(backoff)
+                continue
+            rate_limit = result.get("rateLimit")
+            if rate_limit is not None:
+                self._record_rate_limit(operation, rate_limit)
+            if page_sizer is not None:
+                page_sizer.succeeded(
+                    time.monotonic() - started, (rate_limit or {}).get("cost", 1)
+                )
+            return result
+
+    @staticmethod
+    def _rate_limited(err):
+        return isinstance(err, TransportQueryError) and any(
+            e.get("type") == "RATE_LIMITED" for e in (err.errors or [])
+        )
+
+    def _retryable(self, err):
+        if isinstance(err, TransportServerError):
+            return err.code in GQL_RETRY_STATUS_CODES
+        if isinstance(err, TransportQueryError):
+            return self._rate_limited(err)
+        return isinstance(err, (Timeout, RequestsConnectionError))
+
+
 @attr.s
 class GQLClient:
-    transport = RequestsHTTPTransport(
-        url=GH_GQL_URL, headers={"Authorization": f"bearer {GH_TOKEN}"}
-    )
+    """Access to the process-wide GQL session shared by all wrappers
+
+    The session is connected on first use and kept open until exit, so queries don't
+    reconnect, and its requests.Session pools connections for concurrent threads.
+    Query documents come from the registry, validated there against the schema snapshot
+    once per document, so the client itself never validates or introspects.
+    """
+
+    # rate limit state is shared by all threads, GH counts it per token
+    scheduler = RequestScheduler()
+
+    _shared_session = None
+    _session_lock = threading.Lock()
+
+    # fixture file to record responses to, or replay them from instead of GH
+    record_path = None
+    replay_path = None
+
+    @staticmethod
+    def configure(
+        validate=None, schema_path=SCHEMA_PATH, record_path=None, replay_path=None
+    ):
+        """Set whether query documents are validated against the schema snapshot at schema_path,
+        and the fixture file to record responses to, or replay them from
+        """
+        registry.configure(validate=validate, schema_path=schema_path)
+        GQLClient.record_path = record_path
+        GQLClient.replay_path = replay_path
 
-    @cached_property
+    @property
     def session(self):
-        client = GqlClient(transport=self.transport, fetch_schema_from_transport=True)
-        return client
+        with self._session_lock:
+            if GQLClient._shared_session is None:
+                GQLClient._shared_session = self._connect()
+            return GQLClient._shared_session
+
+    def _connect(self):
+        if self.replay_path:
+            http_transport = None
+            transport = ReplayTransport(self.replay_path)
+        else:
+            # read when connecting, the token isn't needed to replay a fixture
+            transport = http_transport = RequestsHTTPTransport(
+                url=GH_GQL_URL,
+                headers={"Authorization": f"bearer {settings.get('gh_token')}"},
+                timeout=GQL_TIMEOUT_SECONDS,
+            )
+            if self.record_path:
+                transport = RecordingTransport(http_transport, self.record_path)
+        client = GqlClient(transport=transport, fetch_schema_from_transport=False)
+        session = client.connect_sync()
+        if http_transport is not None:
+            pooled_adapter = HTTPAdapter(pool_maxsize=GQL_POOL_SIZE)
+            for prefix in "http://", "https://":
+                http_transport.session.mount(prefix, pooled_adapter)
+        atexit.register(client.close_sync)
+        return session
+
+    def execute(self, document, variable_values=None, **kwargs):
+        """Execute a query through the shared RequestScheduler, see its execute"""
+        return self.scheduler.execute(
+            self.session, document, variable_values=variable_values, **kwargs
+        )
+
+
+@attr.s
+class PRWindow:
+    """Date window to select PRs by, searching on created or merged dates
+
+    Either end of the window can be left open with None
+    """
+
+    since = attr.ib(default=None)
+    until = attr.ib(default=None)
+    qualifier = attr.ib(
+        default="created", validator=attr.validators.in_(["created", "merged"])
+    )
+
+    def search_query(self, organization, repo_name):
+        """GH search string for the repo's PRs in the window, newest created first"""
+        since = self.since and self.since.strftime(GH_SEARCH_DATE_FMT)
+        until = self.until and self.until.strftime(GH_SEARCH_DATE_FMT)
+        if since and until:
+            date_range = f"{since}..{until}"
+        elif since:
+            date_range = f">={since}"
+        else:
+            date_range = f"<={until}"
+        return (
+            f"repo:{organization}/{repo_name} is:pr "
+            f"{self.qualifier}:{date_range} sort:created-desc"
+        )
+
+
+def node_login(actor_node):
+    """Interned login of an author or actor node, GHOST_LOGIN for a deleted account
+
+    GitHub returns null instead of the actor for accounts that were deleted
+    """
+    return intern((actor_node or {}).get("login") or GHOST_LOGIN)
+
+
+class ReviewerTeamsError(Exception):
+    """The repo's reviewer teams are missing from the settings, or not on the organization"""
 
 
 @attr.s
@@ -44,122 +431,301 @@ class RepoWrapper:
 
     organization = attr.ib()
     repo_name = attr.ib()
+    pr_cache = attr.ib(default=None)  # PRNodeCache, None to always fetch from GitHub
 
     gql_client = GQLClient()
 
+    # TeamMembersCache shared by every repo across runs, None to fetch teams every run
+    team_cache = None
+    # team members by organization and slug, shared by every repo for the whole run
+    _team_members = {}
+    _team_members_lock = threading.Lock()
+
+    @classmethod
+    def clear_team_members(cls):
+        """Forget the run's team members, so they're read from team_cache or GitHub again"""
+        with cls._team_members_lock:
+            cls._team_members.clear()
+
+    def team_members(self, slug):
+        """Logins of the org team's members, fetched once per run, or per team_cache TTL"""
+        with self._team_members_lock:
+            key = (self.organization, slug)
+            if key not in RepoWrapper._team_members:
+                logins = self.team_cache and self.team_cache.members(*key)
+                if logins is None:
+                    logins = self._fetch_team_members(slug)
+                    if self.team_cache and self.team_cache.store(*key, logins):
+                        logger.info(f"Updated the cached members of team {slug}")
+                RepoWrapper._team_members[key] = logins
+            return RepoWrapper._team_members[key]
+
+    def _fetch_team_members(self, slug):
+        """Page through the members of the org team
+
+        Raises:
+            ValueError: when the organization has no team with the slug
+        """
+        logins = []
+        members_cursor = None
+        while True:
+            team = self.gql_client.execute(
+                registry.document(review_teams_query.team_members_query),
+                variable_values={
+                    "organization": self.organization,
+                    "team": slug,
+                    "membersCursor": members_cursor,
+                },
+            )["organization"]["team"]
+            if team is None:
+                raise ValueError(f"[{self.organization}] has no team {slug}")
+            members = team["members"]
+            logins.extend(m["login"] for m in members["nodes"])
+            if not members["pageInfo"]["hasNextPage"]:
+                return logins
+            members_cursor = members["pageInfo"]["endCursor"]
+
     @cached_property
     def reviewer_teams(self):
-        """Look up teams on the org, compare to settings file for tier1/tier2 teams
+        """Look up the tier1/tier2 teams from the settings file on the org
 
         Returns:
             dictionary, keyed on 'tier1' and 'tier2', with lists of team members
         """
-        with self.gql_client.session as gql_session:
-            org_teams = gql_session.execute(
-                gql(review_teams_query.org_teams_query),
-                variable_values={"organization": self.organization},
-            )["organization"]["teams"]["nodes"]
         try:
-            settings_team_names = settings.reviewer_teams.get(self.organization).get(
-                self.repo_name
-            )
-            tier_1_team = [
-                t for t in org_teams if t["name"] == settings_team_names.tier1
-            ][0]
-            tier_2_team = [
-                t for t in org_teams if t["name"] == settings_team_names.tier2
-            ][0]
+            settings_team_slugs = reviewer_team_slugs(self.organization, self.repo_name)
             return {
-                "tier1": [m["login"] for m in tier_1_team["members"]["nodes"]],
-                "tier2": [m["login"] for m in tier_2_team["members"]["nodes"]],
+                "tier1": self.team_members(settings_team_slugs.tier1),
+                "tier2": self.team_members(settings_team_slugs.tier2),
             }
-        except Exception:
-            logger.error(
+        except (AttributeError, KeyError, ValueError) as err:
+            raise ReviewerTeamsError(
                 "Reviewer teams have not been entered in settings.yaml, "
-                "or did not match teams on the organization."
-                f"[{self.organization}] teams from GitHub: "
-                f'{[t.get("name") for t in org_teams]}'
+                f"or did not match teams on the organization: {err}"
+            ) from err
+
+    @cached_property
+    def reviewer_index(self):
+        """ReviewerIndex of the reviewer teams, for classifying review authors"""
+        return ReviewerIndex.from_teams(self.reviewer_teams)
+
+    @cached_property
+    def reviewer_teams_fingerprint(self):
+        """Hash of the reviewer teams' members, changes when anyone joins or leaves a tier"""
+        return members_fingerprint(
+            f"{tier}:{login}"
+            for tier, members in self.reviewer_teams.items()
+            for login in members
+        )
+
+    def _fetch_pr_nodes(self, **kwargs):
+        """Page through the repo's PRs, returning the raw PR nodes, see _iter_pr_pages"""
+        return [pr_node for page in self._iter_pr_pages(**kwargs) for pr_node in page]
+
+    def _iter_pr_pages(
+        self,
+        count=None,
+        block_count=50,
+        order_field="CREATED_AT",
+        updated_after=None,
+        pr_window=None,
+    ):
+        """Page through the repo's PRs, yielding a list of raw PR nodes for each page
+
+        Args:
+            count (Int): total number of PRs fetched, None to page until another limit is hit
+            block_count(Int): most PRs to fetch in each query, GH gql limits to 100
+                the page size is tuned below this by the RequestScheduler
+            order_field (str): PullRequestOrderField to page by, newest first
+            updated_after (str): GH timestamp, stop paging at the first PR not updated since
+                only useful with order_field UPDATED_AT
+            pr_window (PRWindow): search for the PRs in this date window instead,
+                newest created first, order_field is not used
+        """
+        if pr_window is not None:
+            query = registry.document(pr_query.pr_search_query)
+            query_variables = {
+                "searchQuery": pr_window.search_query(self.organization, self.repo_name)
+            }
+        else:
+            query = registry.document(pr_query.pr_review_query)
+            query_variables = {
+                "owner": self.organization,
+                "name": self.repo_name,
+                "orderField": order_field,
+            }
+        fetched = 0
+        gql_pr_cursor = None
+        while count is None or fetched < count:
+            if count is not None:
+                block_count = min(block_count, count - fetched)
+            gql_data = self.gql_client.execute(
+                query,
+                variable_values={"prCursor": gql_pr_cursor, **query_variables},
+                page_size_variable="blockCount",
+                page_size_limit=block_count,
             )
-            import sys
+            if pr_window is not None:
+                pr_block = gql_data["search"]
+                if (
+                    gql_pr_cursor is None
+                    and pr_block["issueCount"] > GH_SEARCH_RESULT_LIMIT
+                ):
+                    logger.warning(
+                        f"{pr_block['issueCount']} PRs match the search for "
+                        f"{self.organization}/{self.repo_name}, GitHub search only "
+                        f"returns the newest {GH_SEARCH_RESULT_LIMIT}, "
+                        "narrow the date window to include all of them"
+                    )
+            else:
+                pr_block = gql_data["repository"]["pullRequests"]
+            page_nodes = []
+            reached_cached = False
+            for pr_node in pr_block["nodes"]:
+                if updated_after is not None and pr_node["updatedAt"] <= updated_after:
+                    # reached PRs that are already cached and unchanged
+                    reached_cached = True
+                    break
+                page_nodes.append(pr_node)
+            if count is not None:
+                page_nodes = page_nodes[: count - fetched]
+            complete_timelines(self.gql_client, page_nodes)
+            fetched += len(page_nodes)
+            yield page_nodes
+            if reached_cached or not pr_block["pageInfo"]["hasNextPage"]:
+                break
+            gql_pr_cursor = pr_block["pageInfo"]["endCursor"]
+
+    def _cached_pr_nodes(self, count, block_count):
+        """Refresh the PR cache for this repo, and read the newest count PR nodes from it"""
+        self.refresh_pr_cache(count=count, block_count=block_count)
+        return self.pr_cache.pr_nodes(self.organization, self.repo_name, count)
+
+    def refresh_pr_cache(self, count=100, block_count=50):
+        """Fetch the PRs changed since the PR cache was last synced, and store them
+
+        A cache not covering the newest count PRs without gaps, or never synced,
+        is filled by number, like an uncached fetch.
+        Otherwise only the PRs updated since the last sync are fetched.
 
-            sys.exit(1)
+        Returns:
+            list of the raw PR nodes fetched
+        """
+        covered_count = self.pr_cache.covered_count(self.organization, self.repo_name)
+        last_sync = self.pr_cache.last_sync(self.organization, self.repo_name)
+        complete_below = None
+        if covered_count < count or last_sync is None:
+            logger.debug(
+                f"PR cache for {self.organization}/{self.repo_name} covers {covered_count} "
+                f"of {count} PRs, fetching all"
+            )
+            pr_nodes = self._fetch_pr_nodes(count=count, block_count=block_count)
+            # fewer than count nodes, the fetch reached the repo's first PR
+            complete_below = (
+                min(map(pr_number, pr_nodes)) if len(pr_nodes) >= count else 0
+            )
+        else:
+            pr_nodes = self._fetch_pr_nodes(
+                block_count=block_count,
+                order_field="UPDATED_AT",
+                updated_after=last_sync,
+            )
+            logger.debug(
+                f"PR cache for {self.organization}/{self.repo_name} "
+                f"refreshed {len(pr_nodes)} PRs"
+            )
+        self.pr_cache.store(
+            self.organization, self.repo_name, pr_nodes, complete_below=complete_below
+        )
+        return pr_nodes
 
-    def pull_requests(self, count=100, block_count=50):
+    def pull_requests(self, count=100, block_count=50, pr_window=None):
         """dictionary of PRWrapper instances, keyed on PR numbers
         Args:
-            count (Int): total number of PRs fetched
+            count (Int): total number of PRs fetched, not used with pr_window
             block_count(Int): number of PRs to fetch in each query, GH gql limits to 100
+            pr_window (PRWindow): fetch only the PRs in this date window
         """
-        # gql query grabs blocks of 50 PRs at a time
-        if block_count > count:
-            block_count = count
-        pr_nodes = []
-        fetched = 0  # tracks total number of PRs pulled
-        gql_pr_cursor = None
-        with self.gql_client.session as gql_session:
-            while fetched < count:
-                pr_block = gql_session.execute(
-                    gql(pr_query.pr_review_query),
-                    variable_values={
-                        "prCursor": gql_pr_cursor,
-                        "blockCount": block_count,
-                    },
-                )
-                gql_pr_cursor = pr_block["repository"]["pullRequests"]["pageInfo"][
-                    "endCursor"
-                ]
-                pr_nodes.extend(pr_block["repository"]["pullRequests"]["nodes"])
-                fetched += block_count
-        prws = {}
-        # flatten data_blocks a bit, we just want the nodes
-        for pr_node in pr_nodes:
-            pr_num = pr_node["url"].split("/")[-1]
-
-            if pr_node["author"]["login"] == "pyup-bot":
-                continue  # ignore pyup PRs
-
-            # wrap timeline events first
-            # maybe move the events into a PRWrapper property
-            events = []
-            for e in pr_node["timelineItems"]["nodes"]:
-                if e.get("author", {}).get("login") == "codecov":
-                    continue  # ignore codecov comments
-                event_class = EVENT_CLASS_MAP[e.pop("__typename")]
-                if e.get("author") or e.get("actor"):
-                    # some events use actor instead of author, standardize it
-                    e["author"] = (
-                        e.pop("author", {}).get("login") or e.pop("actor")["login"]
-                    )
-                if e.get("createdAt"):
-                    # just change the camel to underscore formatting
-                    e["created_at"] = e.pop("createdAt")
-                events.append(event_class(**e))
+        return {
+            int(prw.number): prw
+            for prw in self.iter_pull_requests(
+                count=count, block_count=block_count, pr_window=pr_window
+            )
+        }
 
-            if pr_node["mergedAt"] is not None:
-                pr_merged = datetime.strptime(pr_node["mergedAt"], GH_TS_FMT)
-            else:
-                pr_merged = None
-
-            prws[int(pr_num)] = PRWrapper(
-                number=pr_num,
-                repo=self,
-                url=pr_node["url"],
-                author=pr_node["author"]["login"],
-                created_at=pr_node["createdAt"],
-                is_draft=pr_node["isDraft"],
-                timeline_events=events,
-                merged_by=(pr_node["mergedBy"] or {}).pop("login", None),
-                merged_at=pr_merged,
-                changed_files=pr_node["changedFiles"],
-                state=pr_node["state"],
-                additions=pr_node["additions"],
-                deletions=pr_node["deletions"],
+    def iter_pull_requests(self, count=100, block_count=50, pr_window=None):
+        """Yield PRWrapper instances as their pages arrive, newest first
+
+        The next page is fetched in the background while the current one is processed.
+        With a pr_cache the cache is refreshed first, and PRs are read from it.
+        Arguments are the same as pull_requests, PRs are yielded once like its keys.
+        """
+        seen = set()  # search results can shift between pages
+        if pr_window is not None:
+            pages = prefetched(
+                self._iter_pr_pages(block_count=block_count, pr_window=pr_window)
             )
-        return prws
+        elif self.pr_cache is not None:
+            pages = [self._cached_pr_nodes(count=count, block_count=block_count)]
+        else:
+            pages = prefetched(
+                self._iter_pr_pages(count=count, block_count=block_count)
+            )
+        for pr_nodes in pages:
+            if pr_window is not None and self.pr_cache is not None:
+                # a window isn't a complete sync, keep the watermark where it was
+                self.pr_cache.store(
+                    self.organization, self.repo_name, pr_nodes, advance_sync=False
+                )
+            for pr_node in pr_nodes:
+                prw = self.wrap_pr_node(pr_node)
+                if prw is not None and prw.number not in seen:
+                    seen.add(prw.number)
+                    yield prw
+
+    def wrap_pr_node(self, pr_node):
+        """PRWrapper for a raw PR node from the PR query, None for ignored PRs"""
+        pr_num = pr_node["url"].split("/")[-1]
+        pr_author = node_login(pr_node["author"])
+
+        if pr_author == "pyup-bot":
+            return None  # ignore pyup PRs
+
+        # wrap timeline events first
+        # maybe move the events into a PRWrapper property
+        events = []
+        for e in pr_node["timelineItems"]["nodes"]:
+            # some events use actor instead of author, standardize it
+            author = node_login(e.get("author") or e.get("actor"))
+            if author == "codecov":
+                continue  # ignore codecov comments
+            event_class = EVENT_CLASS_MAP[e["__typename"]]
+            events.append(event_class.from_node(e, author=author))
+
+        merged_by = node_login(pr_node["mergedBy"]) if pr_node["mergedAt"] else None
+        return PRWrapper(
+            number=pr_num,
+            repo=self,
+            url=pr_node["url"],
+            author=pr_author,
+            created_ts=gh_timestamp(pr_node["createdAt"]),
+            is_draft=pr_node["isDraft"],
+            timeline_events=events,
+            merged_by=merged_by,
+            merged_ts=pr_node["mergedAt"] and gh_timestamp(pr_node["mergedAt"]),
+            changed_files=pr_node["changedFiles"],
+            state=intern(pr_node["state"]),
+            additions=pr_node["additions"],
+            deletions=pr_node["deletions"],
+        )
 
-    def reviewer_team_actions(self, pr_count=100):
+    def reviewer_team_actions(self, pr_count=100, pr_window=None, prs=None):
         """Go through PRs and pull out reviewer actions, collecting them by reviewer teams
 
+        Args:
+            pr_count, pr_window: PRs to fetch, like iter_pull_requests
+            prs: PRWrapper instances already fetched from the repo, used instead
+
         Returns
             dictionary of tier1/tier2, where for each actions are listed for every member in team
             count of PRs opened included with tier1, author as 'opened'
@@ -168,58 +734,65 @@ class RepoWrapper:
         reviewer_team_member_actions = {
             k: {m: [] for m in v} for k, v in self.reviewer_teams.items()
         }
-        reviewer_team_member_actions["tier1"]["opened"] = []
-        reviewer_team_member_actions["tier2"]["merged"] = []
-        for pr in self.pull_requests(count=pr_count).values():
-            t1_reviews_only = [
-                r for r in pr.reviews_by_tier1 if isinstance(r, PRReviewWrapper)
-            ]
-            for t1 in t1_reviews_only:
-                reviewer_team_member_actions["tier1"][t1.author].append(
-                    (t1.created_at, t1.state)
-                )
-            reviewer_team_member_actions["tier1"]["opened"].append(
-                (pr.created_at, "ready")
-            )
-            t2_reviews_only = [
-                r for r in pr.reviews_by_tier2 if isinstance(r, PRReviewWrapper)
-            ]
-            for t2 in t2_reviews_only:
-                reviewer_team_member_actions["tier2"][t2.author].append(
-                    (t2.created_at, t2.state)
-                )
-            if pr.merged_at is not None:
-                reviewer_team_member_actions["tier2"]["merged"].append(
-                    (pr.merged_at, "merged")
+        reviewer_team_member_actions["tier1"][OPENED] = []
+        reviewer_team_member_actions["tier2"][MERGED] = []
+        if prs is None:
+            prs = self.iter_pull_requests(count=pr_count, pr_window=pr_window)
+        for pr in prs:
+            for tier, reviewer, created_at, action in pr.team_actions():
+                reviewer_team_member_actions[tier][reviewer].append(
+                    (created_at, action)
                 )
         return reviewer_team_member_actions
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class EventWrapper:
-    """Class for modeling the events in GH"""
+    """Class for modeling the events in GH
+
+    Slotted and frozen, a repo's history has several events per PR
+    created_ts is the epoch timestamp, created_at is its datetime
+    """
 
     author = attr.ib()
-    created_at = attr.ib(converter=lambda t: datetime.strptime(t, GH_TS_FMT))
+    created_ts = attr.ib()
 
+    @property
+    def created_at(self):
+        return gh_datetime(self.created_ts)
 
-@attr.s
+    @classmethod
+    def from_node(cls, node, author):
+        """Event for a raw timeline item node, author is its login"""
+        return cls(author=author, created_ts=gh_timestamp(node["createdAt"]))
+
+
+@attr.s(slots=True, frozen=True)
 class PRCommentWrapper(EventWrapper):
     pass
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class PRReviewWrapper(EventWrapper):
     state = attr.ib()
-    comments = attr.ib()
+    comments = attr.ib()  # count of the review's comments
+
+    @classmethod
+    def from_node(cls, node, author):
+        return cls(
+            author=author,
+            created_ts=gh_timestamp(node["createdAt"]),
+            state=intern(node["state"]),
+            comments=node["comments"]["totalCount"],
+        )
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class DraftWrapper(EventWrapper):
     pass
 
 
-@attr.s
+@attr.s(slots=True, frozen=True)
 class ReadyWrapper(EventWrapper):
     pass  # same attrs as draft
 
@@ -241,17 +814,25 @@ class PRWrapper:
     number = attr.ib()
     repo = attr.ib()
     url = attr.ib()
-    created_at = attr.ib(converter=lambda t: datetime.strptime(t, "%Y-%m-%dT%H:%M:%SZ"))
+    created_ts = attr.ib()
     author = attr.ib()
     timeline_events = attr.ib()
     is_draft = attr.ib()
     state = attr.ib()
     changed_files = attr.ib()
     merged_by = attr.ib()
-    merged_at = attr.ib()
+    merged_ts = attr.ib()
     additions = attr.ib()
     deletions = attr.ib()
 
+    @property
+    def created_at(self):
+        return gh_datetime(self.created_ts)
+
+    @property
+    def merged_at(self):
+        return None if self.merged_ts is None else gh_datetime(self.merged_ts)
+
     def __repr__(self):
         return (
             f'[{self.url.split("/")[-1]}] by {self.author}, '
@@ -259,57 +840,52 @@ class PRWrapper:
         )
 
     @cached_property
+    def review_summary(self):
+        """PRReviewSummary of the PR's reviews, classified against the repo's reviewer tiers"""
+        return PRReviewSummary.from_pr(self, self.repo.reviewer_index)
+
+    def team_actions(self):
+        """(tier, reviewer, datetime, action) for the PR's tier reviews, opening and merge
+
+        Reviews are tier1 first, then tier2, the PR opening counts for tier1 and its merge for tier2
+        """
+        for t1 in self.reviews_by_tier1:
+            if isinstance(t1, PRReviewWrapper):
+                yield "tier1", t1.author, t1.created_at, t1.state
+        yield "tier1", OPENED, self.created_at, "ready"
+        for t2 in self.reviews_by_tier2:
+            if isinstance(t2, PRReviewWrapper):
+                yield "tier2", t2.author, t2.created_at, t2.state
+        if self.merged_at is not None:
+            yield "tier2", MERGED, self.merged_at, "merged"
+
+    @property
     def reviews_and_comments(self):
         """Collects reviews and PR comments, sorted by creation date"""
-        review_events = filter(
-            lambda e: isinstance(e, (PRReviewWrapper, PRCommentWrapper)),
-            self.timeline_events,
-        )
-        events_not_by_author = [
-            review for review in review_events if review.author != self.author
-        ]
-        events_not_by_author.sort(key=lambda r: r.created_at)
-        return events_not_by_author
+        return self.review_summary.reviews_and_comments
 
-    @cached_property
+    @property
     def reviews_by_tier1(self):
-        if not self.reviews_and_comments:
-            return []
-        return [
-            review
-            for review in self.reviews_and_comments
-            if review.author in self.repo.reviewer_teams["tier1"]
-        ]
+        return self.review_summary.reviews_by_tier1
 
-    @cached_property
+    @property
     def reviews_by_tier2(self):
-        if not self.reviews_and_comments:
-            return []
-        return [
-            review
-            for review in self.reviews_and_comments
-            if review.author in self.repo.reviewer_teams["tier2"]
-        ]
+        return self.review_summary.reviews_by_tier2
 
-    @cached_property
+    @property
     def reviews_by_non_tier(self):
-        return list(
-            set([r.author for r in self.reviews_and_comments])
-            - (
-                set([r.author for r in self.reviews_by_tier1])
-                | set([r.author for r in self.reviews_by_tier2])
-            )
-        )
+        """Logins of reviewers in neither tier, in the order they first reviewed"""
+        return self.review_summary.non_tier_reviewers
 
-    @cached_property
+    @property
     def first_review(self):
         """When the first review on the PR occurred
         Sorts the reviews not by the author, oldest first
         Returns None if there are no reviews
         """
-        return None if not self.reviews_and_comments else self.reviews_and_comments[0]
+        return next(iter(self.reviews_and_comments), None)
 
-    @cached_property
+    @property
     def second_review(self):
         """When the first review on the PR occurred
         Sorts the reviews not by the author, oldest first
@@ -319,7 +895,7 @@ class PRWrapper:
             None if len(self.reviews_and_comments) < 2 else self.reviews_and_comments[1]
         )
 
-    @cached_property
+    @property
     def ready_for_review(self):
         """Determine when the PR entered ready_for_review state
 
@@ -329,100 +905,146 @@ class PRWrapper:
         Returns:
             list of ReadyWrapper instances
         """
-        # don't want a generator here, wrapping with list explicitly
-        ready_events = list(
-            filter(lambda e: isinstance(e, ReadyWrapper), self.timeline_events)
-        )
-        ready_events.sort(key=lambda e: e.created_at)
-        return ready_events or [
-            ReadyWrapper(
-                author=self.author, created_at=self.created_at.strftime(GH_TS_FMT)
-            )
-        ]
+        return self.review_summary.ready_for_review
 
-    @cached_property
-    def comment_comparison_date(self):
-        # if there were comments before a 'ready for review' event, use PR creation
-        if self.first_review.created_at > self.ready_for_review[0].created_at:
-            comparison_date = self.ready_for_review[0].created_at
-        else:
-            comparison_date = self.created_at
-        return comparison_date
+    @property
+    def comment_comparison_ts(self):
+        return self.review_summary.comment_comparison_ts
 
-    @cached_property
+    @property
     def hours_to_first_review(self):
         """calculate the time from being ready for review to the first review or comment
 
-        Few things to account for here
-        0. No reviews yet
-        1. PR opened in ready state, no events present for draft/ready
-        2. PR opened in draft state, event for ready
-        3. PR is still in draft state, value is N/A
-        4. PR has multiple draft/ready state events
-
-        In case #4, we need to look at whether there are any comments/reviews and
-        look at the first review against the closest ready event
-
-        Args:
-            pr: a PRWrapper object
+        See PRReviewSummary.from_pr
         """
-        # case 0, no review yet or case 3, PR in draft state
-        if self.first_review is None or self.is_draft:
-            return None
-
-        # case 2, use event for draft state
-        # case 1, use creation date
-        # both handled by self.ready_for_review
-        # if there were comments before a 'ready for review' event, use PR creation
-        return round(
-            (
-                self.first_review.created_at - self.comment_comparison_date
-            ).total_seconds()
-            / SECONDS_TO_HOURS,
-            1,
-        )
+        return self.review_summary.hours_to_first_review
 
-    @cached_property
+    @property
     def hours_to_tier1(self):
-        if not self.reviews_by_tier1:
-            return None
-        return round(
-            (
-                self.reviews_by_tier1[0].created_at - self.comment_comparison_date
-            ).total_seconds()
-            / SECONDS_TO_HOURS,
-            1,
-        )
+        return self.review_summary.hours_to_tier1
 
-    @cached_property
+    @property
     def hours_to_tier2(self):
         """Calculate the time to the first approved tier2 review"""
-        if not self.reviews_by_tier2:
-            return None
-        return round(
-            (
-                self.reviews_by_tier2[0].created_at - self.comment_comparison_date
-            ).total_seconds()
-            / SECONDS_TO_HOURS,
-            1,
-        )
+        return self.review_summary.hours_to_tier2
 
-    @cached_property
+    @property
     def hours_from_tier1_to_tier2(self):
         """This has some problems - if there is no approved tier1 review, this doesn't mean much
         If there was no tier1 review at all, it means nothing
         """
-        approved_reviews = [
-            r for r in self.reviews_by_tier1 if getattr(r, "state", None) == "APPROVED"
+        return self.review_summary.hours_from_tier1_to_tier2
+
+
+@attr.s(slots=True, frozen=True)
+class ReviewerIndex:
+    """Logins of the reviewer teams as frozensets, for constant time tier lookups"""
+
+    tier1 = attr.ib(converter=frozenset)
+    tier2 = attr.ib(converter=frozenset)
+
+    @classmethod
+    def from_teams(cls, reviewer_teams):
+        """Index for a reviewer_teams dict, like RepoWrapper.reviewer_teams"""
+        return cls(tier1=reviewer_teams["tier1"], tier2=reviewer_teams["tier2"])
+
+
+def review_hours(end_ts, start_ts):
+    return round((end_ts - start_ts) / SECONDS_TO_HOURS, 1)
+
+
+@attr.s(slots=True, frozen=True)
+class PRReviewSummary:
+    """A PR's review events classified by reviewer tier, with its review latencies
+
+    Built once per PR by from_pr, the PRWrapper review properties read from it
+    """
+
+    reviews_and_comments = attr.ib()
+    reviews_by_tier1 = attr.ib()
+    reviews_by_tier2 = attr.ib()
+    non_tier_reviewers = attr.ib()
+    ready_for_review = attr.ib()
+    comment_comparison_ts = attr.ib()
+    hours_to_first_review = attr.ib()
+    hours_to_tier1 = attr.ib()
+    hours_to_tier2 = attr.ib()
+    hours_from_tier1_to_tier2 = attr.ib()
+
+    @classmethod
+    def from_pr(cls, pr, reviewer_index):
+        """Classify the PR's timeline events, and calculate the latencies from them
+
+        Reviews and comments not by the PR author are sorted by time, then split by tier
+        in a single pass, a login in both tiers counts for both.
+
+        Latencies are hours from the PR being ready for review, the earliest ready event
+        if the first review came after it, else the PR creation. None when there was no
+        such review, and for the first review of a PR still in draft.
+        The tier1 to tier2 latency is from the first approving tier1 review.
+        """
+        reviews = []
+        ready_events = []
+        for event in pr.timeline_events:
+            if isinstance(event, ReadyWrapper):
+                ready_events.append(event)
+            elif (
+                isinstance(event, (PRReviewWrapper, PRCommentWrapper))
+                and event.author != pr.author
+            ):
+                reviews.append(event)
+        reviews.sort(key=lambda e: e.created_ts)
+        ready_events.sort(key=lambda e: e.created_ts)
+        # PR opened in ready state, no events present for draft/ready
+        ready_events = ready_events or [
+            ReadyWrapper(author=pr.author, created_ts=pr.created_ts)
         ]
-        if not approved_reviews or not self.reviews_by_tier2:
-            return None
-        return round(
-            (
-                self.reviews_by_tier2[0].created_at - approved_reviews[0].created_at
-            ).total_seconds()
-            / SECONDS_TO_HOURS,
-            1,
+
+        tier1, tier2, non_tier = [], [], {}
+        tier1_approval = None
+        for review in reviews:
+            in_tier1 = review.author in reviewer_index.tier1
+            in_tier2 = review.author in reviewer_index.tier2
+            if in_tier1:
+                tier1.append(review)
+                approved = getattr(review, "state", None) == "APPROVED"
+                if approved and tier1_approval is None:
+                    tier1_approval = review
+            if in_tier2:
+                tier2.append(review)
+            if not (in_tier1 or in_tier2):
+                non_tier.setdefault(review.author)
+
+        # if there were comments before a 'ready for review' event, use PR creation
+        if not reviews:
+            comparison_ts = None
+        elif reviews[0].created_ts > ready_events[0].created_ts:
+            comparison_ts = ready_events[0].created_ts
+        else:
+            comparison_ts = pr.created_ts
+        return cls(
+            reviews_and_comments=reviews,
+            reviews_by_tier1=tier1,
+            reviews_by_tier2=tier2,
+            non_tier_reviewers=list(non_tier),
+            ready_for_review=ready_events,
+            comment_comparison_ts=comparison_ts,
+            hours_to_first_review=(
+                review_hours(reviews[0].created_ts, comparison_ts)
+                if reviews and not pr.is_draft
+                else None
+            ),
+            hours_to_tier1=(
+                review_hours(tier1[0].created_ts, comparison_ts) if tier1 else None
+            ),
+            hours_to_tier2=(
+                review_hours(tier2[0].created_ts, comparison_ts) if tier2 else None
+            ),
+            hours_from_tier1_to_tier2=(
+                review_hours(tier2[0].created_ts, tier1_approval.created_ts)
+                if tier1_approval and tier2
+                else None
+            ),
         )
 
 
@@ -436,15 +1058,149 @@ class OrgWrapper:
 
     def team_members(self, team):
         """Get the logins for the given team"""
-        with self.gql_client.session as gql_session:
-            gql_data = gql_session.execute(
-                gql(contributors_query.org_team_members_query),
-                variable_values={"organization": self.name, "team": team},
-            )
+        gql_data = self.gql_client.execute(
+            registry.document(contributors_query.org_team_members_query),
+            variable_values={"organization": self.name, "team": team},
+        )
+        if gql_data["organization"]["team"] is None:
+            raise ValueError(f"[{self.name}] has no team {team}")
         return [
             u["login"] for u in gql_data["organization"]["team"]["members"]["nodes"]
         ]
 
+    def repositories(self):
+        """Names of the org's repositories that aren't archived, sorted by name"""
+        names = []
+        repo_cursor = None
+        while True:
+            repositories = self.gql_client.execute(
+                registry.document(contributors_query.org_repositories_query),
+                variable_values={"organization": self.name, "repoCursor": repo_cursor},
+            )["organization"]["repositories"]
+            names.extend(r["name"] for r in repositories["nodes"])
+            if not repositories["pageInfo"]["hasNextPage"]:
+                return names
+            repo_cursor = repositories["pageInfo"]["endCursor"]
+
+    def iter_repo_pr_pages(
+        self, repo_names, count=100, block_count=50, repos_per_query=REPOS_PER_QUERY
+    ):
+        """Page through the PRs of multiple repos, several repos in each query
+
+        Each query is a repos_pr_pages_query for up to repos_per_query repos still paging,
+        newest created PRs first, like RepoWrapper._iter_pr_pages without a cache or window.
+        Timelines are completed for all the repos' PRs in each round of queries together.
+
+        Args:
+            repo_names: names of the org's repositories
+            count (Int): number of PRs to fetch for each repo
+            block_count (Int): most PRs to fetch in each repo's page, GH gql limits to 100
+                the page size is tuned below this by the RequestScheduler
+            repos_per_query (Int): most repos in each query
+
+        Yields:
+            tuples of repo name and the list of raw PR nodes in one of its pages
+        """
+        # repos still paging, with their next cursor
+        cursors = dict.fromkeys(repo_names)
+        fetched = dict.fromkeys(repo_names, 0)
+        while cursors:
+            pages = []
+            paging = list(cursors)
+            for batch_start in range(0, len(paging), repos_per_query):
+                batch = paging[batch_start:][:repos_per_query]
+                variable_values = {"owner": self.name}
+                for i, repo_name in enumerate(batch):
+                    variable_values[f"name_{i}"] = repo_name
+                    variable_values[f"cursor_{i}"] = cursors[repo_name]
+                gql_data = self.gql_client.execute(
+                    registry.built_document(pr_query.repos_pr_pages_query, len(batch)),
+                    variable_values=variable_values,
+                    page_size_variable="blockCount",
+                    page_size_limit=min(
+                        block_count, max(count - fetched[r] for r in batch)
+                    ),
+                )
+                for i, repo_name in enumerate(batch):
+                    pr_block = gql_data[f"r{i}"]["pullRequests"]
+                    page_nodes = pr_block["nodes"][: count - fetched[repo_name]]
+                    fetched[repo_name] += len(page_nodes)
+                    if (
+                        fetched[repo_name] >= count
+                        or not pr_block["pageInfo"]["hasNextPage"]
+                    ):
+                        del cursors[repo_name]
+                    else:
+                        cursors[repo_name] = pr_block["pageInfo"]["endCursor"]
+                    pages.append((repo_name, page_nodes))
+            complete_timelines(
+                self.gql_client, [n for _, page_nodes in pages for n in page_nodes]
+            )
+            yield from pages
+
+    def team_contributions(
+        self,
+        team,
+        windows,
+        members_per_page=50,
+        windows_per_query=CONTRIBUTION_WINDOWS_PER_QUERY,
+    ):
+        """Get the contribution counts of every member of the team for multiple date ranges
+
+        All members are fetched in bulk, paginating through team members,
+        with windows batched into each query like UserWrapper.contributions_by_window
+
+        Args:
+            team: team slug
+            windows: list of (from_date, to_date) datetime tuples
+            members_per_page: most members in each query, GH gql limits to 100
+                the page size is tuned below this by the RequestScheduler
+            windows_per_query: maximum windows in one query, bounded by GH query cost
+
+        Return:
+            dict keyed on member login, with a list of flattened contribution counts
+            like UserWrapper.contributions, in the same order as windows,
+            and None for windows queried while the login wasn't a member
+
+        Raises:
+            ValueError: when the organization has no team with the slug
+        """
+        member_counts = defaultdict(lambda: [None] * len(windows))
+        for batch_start in range(0, len(windows), windows_per_query):
+            batch = windows[batch_start:][:windows_per_query]
+            window_values = {}
+            for i, (from_date, to_date) in enumerate(batch):
+                window_values[f"from_{i}"] = from_date.isoformat(timespec="seconds")
+                window_values[f"to_{i}"] = to_date.isoformat(timespec="seconds")
+            members_cursor = None
+            while True:
+                team_data = self.gql_client.execute(
+                    registry.built_document(
+                        contributors_query.contributions_counts_by_org_members_windows_query,
+                        len(batch),
+                    ),
+                    variable_values={
+                        "organization": self.name,
+                        "team": team,
+                        "membersCursor": members_cursor,
+                        **window_values,
+                    },
+                    page_size_variable="membersCount",
+                    page_size_limit=members_per_page,
+                )["organization"]["team"]
+                if team_data is None:
+                    raise ValueError(f"[{self.name}] has no team {team}")
+                members = team_data["members"]
+                for member in members["nodes"]:
+                    for i in range(len(batch)):
+                        member_counts[member["login"]][batch_start + i] = (
+                            flatten_contribution_counts(member[f"w{i}"])
+                        )
+                if not members["pageInfo"]["hasNextPage"]:
+                    break
+                members_cursor = members["pageInfo"]["endCursor"]
+        return dict(member_counts)
+
 
 @attr.s
 class UserWrapper:
@@ -473,29 +1229,60 @@ class UserWrapper:
         """  # noqa: E501
         from_date = from_date or (NOW - WEEK_DELTA)
         to_date = to_date or NOW
-        with self.gql_client.session as gql_session:
-            gql_data = gql_session.execute(
-                gql(contributors_query.contributions_counts_by_user_query),
-                variable_values={
-                    "user": self.login,
-                    "from_date": from_date.isoformat(timespec="seconds"),
-                    "to_date": to_date.isoformat(timespec="seconds"),
-                },
+        return self.contributions_by_window([(from_date, to_date)])[0]
+
+    def contributions_by_window(
+        self, windows, windows_per_query=CONTRIBUTION_WINDOWS_PER_QUERY
+    ):
+        """Get the contributions collections for multiple date ranges
+
+        Windows are batched into queries with an aliased contributionsCollection each,
+        instead of making a request per window
+
+        Args:
+            windows: list of (from_date, to_date) datetime tuples
+            windows_per_query: maximum windows in one query, bounded by GH query cost
+
+        Return:
+            list of flattened contribution counts, as returned by contributions,
+            in the same order as windows
+        """
+        window_counts = []
+        for batch_start in range(0, len(windows), windows_per_query):
+            batch = windows[batch_start:][:windows_per_query]
+            variable_values = {"user": self.login}
+            for i, (from_date, to_date) in enumerate(batch):
+                variable_values[f"from_{i}"] = from_date.isoformat(timespec="seconds")
+                variable_values[f"to_{i}"] = to_date.isoformat(timespec="seconds")
+            gql_data = self.gql_client.execute(
+                registry.built_document(
+                    contributors_query.contributions_counts_by_user_windows_query,
+                    len(batch),
+                ),
+                variable_values=variable_values,
             )
-        # flatten dictionary value lists to repo name key and count value
-        # also shortening the type string
-        flattened_counts = defaultdict(lambda: defaultdict(dict))
-        for cont_type, repo_conts in Box(
-            gql_data["user"]["contributionsCollection"]
-        ).items():
-            short_type = cont_type[
-                0 : cont_type.index("ContributionsByRepository")  # noqa: E203
-            ]
-            if repo_conts:
-                for repo_cont in repo_conts:
-                    flattened_counts[short_type][
-                        repo_cont.repository.name
-                    ] = repo_cont.contributions.totalCount
-            else:  # some are empty lists
-                flattened_counts[short_type] = {}
-        return flattened_counts
+            window_counts.extend(
+                flatten_contribution_counts(gql_data["user"][f"w{i}"])
+                for i in range(len(batch))
+            )
+        return window_counts
+
+
+def flatten_contribution_counts(contributions_collection):
+    """flatten contributionsCollection value lists to repo name key and count value
+
+    also shortening the type string, pullRequestContributionsByRepository -> pullRequest
+    """
+    flattened_counts = defaultdict(lambda: defaultdict(dict))
+    for cont_type, repo_conts in Box(contributions_collection).items():
+        short_type = cont_type[
+            0 : cont_type.index("ContributionsByRepository")  # noqa: E203
+        ]
+        if repo_conts:
+            for repo_cont in repo_conts:
+                flattened_counts[short_type][
+                    repo_cont.repository.name
+                ] = repo_cont.contributions.totalCount
+        else:  # some are empty lists
+            flattened_counts[short_type] = {}
+    return flattened_counts
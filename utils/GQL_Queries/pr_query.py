@@ -1,53 +1,158 @@
 # Importable strings for GQL queries
+# every query selects rateLimit, for the RequestScheduler
+# owner and name variables select the repository
 # Paginated on 50 PRs at a time by default
 # pagination blocks and the cursor for pagination are variables for the query
+# orderField can be UPDATED_AT to page through the most recently changed PRs first
+# only the first page of timeline items is included, see pr_timeline_pages_query for the rest
 
-pr_review_query = """query getPRs($prCursor: String, $blockCount: Int = 50) {
-  repository(owner:"SatelliteQE", name:"Robottelo") {
+timeline_items_fragment = """
+fragment timelineItemFields on PullRequestTimelineItems {
+  ... on ConvertToDraftEvent {
+    __typename
+    createdAt
+    actor {login}
+  }
+  ... on ReadyForReviewEvent {
+    __typename
+    createdAt
+    actor {login}
+  }
+  ... on PullRequestReview {
+    __typename
+    author {login}
+    state
+    createdAt
+    comments {totalCount}
+  }
+  ... on IssueComment {
+    __typename
+    author {login}
+    createdAt
+  }
+}
+"""
+
+# PR fields selected by both the repository and search queries
+pull_request_fragment = """
+fragment pullRequestFields on PullRequest {
+  id
+  author {login}
+  url
+  createdAt
+  updatedAt
+  isDraft
+  changedFiles
+  mergedBy {login}
+  mergedAt
+  state
+  additions
+  deletions
+  timelineItems(first: $timelineCount, itemTypes: [PULL_REQUEST_REVIEW, ISSUE_COMMENT, CONVERT_TO_DRAFT_EVENT, READY_FOR_REVIEW_EVENT]){
+    totalCount
+    pageInfo {endCursor hasNextPage}
+    nodes {
+      ...timelineItemFields
+    }
+  }
+}
+"""  # noqa: E501
+
+pr_review_query = (
+    """query getPRs($owner: String!, $name: String!, $prCursor: String, $blockCount: Int = 50, $orderField: PullRequestOrderField = CREATED_AT, $timelineCount: Int = 10) {
+  repository(owner: $owner, name: $name) {
     pullRequests(
         first: $blockCount,
         after:  $prCursor
-        orderBy: {field: CREATED_AT, direction: DESC}) {
+        orderBy: {field: $orderField, direction: DESC}) {
       nodes {
-        author {login}
-        url
-        createdAt
-        isDraft
-        changedFiles
-        mergedBy {login}
-        mergedAt
-        state
-        additions
-        deletions
-        timelineItems(first: 10, itemTypes: [PULL_REQUEST_REVIEW, PULL_REQUEST_REVIEW_THREAD, ISSUE_COMMENT, CONVERT_TO_DRAFT_EVENT, READY_FOR_REVIEW_EVENT]){
-          totalCount
-          nodes {
-            ... on ConvertToDraftEvent {
-              __typename
-              createdAt
-              actor {login}
-            }
-            ... on ReadyForReviewEvent {
-              __typename
-              createdAt
-              actor {login}
-            }
-            ... on PullRequestReview {
-              __typename
-              author {login}
-              state
-              createdAt
-              comments {totalCount}
-            }
-            ... on IssueComment {
-              __typename
-              author {login}
-              createdAt
-            }
-          }
-        }
+        ...pullRequestFields
       }
-      pageInfo {endCursor}
+      pageInfo {endCursor hasNextPage}
     }
   }
+  rateLimit {cost remaining resetAt}
 }"""  # noqa
+    + pull_request_fragment
+    + timeline_items_fragment
+)
+
+# searchQuery is a GH search string, like 'repo:SatelliteQE/robottelo is:pr created:>=2021-01-01'
+# GH search returns at most 1000 results for a search string
+pr_search_query = (
+    """query searchPRs($searchQuery: String!, $prCursor: String, $blockCount: Int = 50, $timelineCount: Int = 10) {
+  search(query: $searchQuery, type: ISSUE, first: $blockCount, after: $prCursor) {
+    issueCount
+    nodes {
+      ...pullRequestFields
+    }
+    pageInfo {endCursor hasNextPage}
+  }
+  rateLimit {cost remaining resetAt}
+}"""  # noqa
+    + pull_request_fragment
+    + timeline_items_fragment
+)
+
+# formatted with the alias index for each PR in pr_timeline_pages_query
+timeline_page_by_node = """  p{index}: node(id: $id_{index}) {{
+    ... on PullRequest {{
+      timelineItems(first: $timelineCount, after: $cursor_{index}, itemTypes: [PULL_REQUEST_REVIEW, ISSUE_COMMENT, CONVERT_TO_DRAFT_EVENT, READY_FOR_REVIEW_EVENT]) {{
+        pageInfo {{endCursor hasNextPage}}
+        nodes {{
+          ...timelineItemFields
+        }}
+      }}
+    }}
+  }}
+"""  # noqa: E501
+
+
+def pr_timeline_pages_query(pr_count):
+    """Build a query for the next page of timeline items on multiple PRs
+
+    Each PR is an aliased node lookup, p0, p1, ... with id_N and cursor_N variables,
+    so PRs with long timelines don't cost a request each.
+    """
+    variables = ", ".join(f"$id_{i}: ID!, $cursor_{i}: String" for i in range(pr_count))
+    prs = "".join(timeline_page_by_node.format(index=i) for i in range(pr_count))
+    return (
+        f"query getPRTimelines($timelineCount: Int = 100, {variables}) {{\n"
+        f"{prs}"
+        "  rateLimit {cost remaining resetAt}\n"
+        "}\n"
+        f"{timeline_items_fragment}"
+    )
+
+
+# formatted with the alias index for each repo in repos_pr_pages_query
+pull_requests_by_repo = """  r{index}: repository(owner: $owner, name: $name_{index}) {{
+    pullRequests(first: $blockCount, after: $cursor_{index}, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+      nodes {{
+        ...pullRequestFields
+      }}
+      pageInfo {{endCursor hasNextPage}}
+    }}
+  }}
+"""  # noqa: E501
+
+
+def repos_pr_pages_query(repo_count):
+    """Build a query for the next page of PRs in multiple repos of the same owner
+
+    Each repo is an aliased repository lookup, r0, r1, ... with name_N and cursor_N variables,
+    so an org's repos don't cost a request each.
+    """
+    variables = ", ".join(
+        f"$name_{i}: String!, $cursor_{i}: String" for i in range(repo_count)
+    )
+    repos = "".join(pull_requests_by_repo.format(index=i) for i in range(repo_count))
+    return (
+        "query getReposPRs($owner: String!, $blockCount: Int = 50, "
+        f"$timelineCount: Int = 10, {variables}) {{\n"
+        f"{repos}"
+        "  rateLimit {cost remaining resetAt}\n"
+        "}\n"
+        f"{pull_request_fragment}"
+        f"{timeline_items_fragment}"
+    )
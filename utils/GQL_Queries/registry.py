@@ -0,0 +1,64 @@
+# Parsed GQL query documents, shared by every wrapper
+# each query string is parsed, and validated against the schema snapshot, only once per process
+# instead of calling gql() on every execute
+from functools import lru_cache
+
+from gql import gql
+from graphql import build_ast_schema
+from graphql import parse
+from graphql import validate as validate_document
+
+from utils.GQL_Queries import schema as schema_snapshot
+from utils.GQL_Queries.schema import SCHEMA_PATH
+from utils.GQL_Queries.schema import load_schema
+
+# validate documents against the schema snapshot when they're first parsed, see configure
+VALIDATE = {"enabled": None}
+
+
+def configure(validate=None, schema_path=SCHEMA_PATH):
+    """Set whether documents are validated, and the schema snapshot they're validated against,
+    clearing any schema and documents already parsed
+
+    Args:
+        validate: True to validate, warning when there's no snapshot, False to skip it,
+            None to validate only when there's a snapshot, quietly skipping it without one
+    """
+    VALIDATE["enabled"] = validate
+    schema_snapshot.configure(schema_path)
+    github_schema.cache_clear()
+    document.cache_clear()
+    built_document.cache_clear()
+
+
+@lru_cache(maxsize=None)
+def github_schema():
+    """GraphQLSchema built from the schema snapshot, None without a snapshot"""
+    sdl = load_schema(required=VALIDATE["enabled"] is True)
+    return None if sdl is None else build_ast_schema(parse(sdl))
+
+
+@lru_cache(maxsize=None)
+def document(query):
+    """The parsed document for a query string, like pr_query.pr_review_query
+
+    Raises:
+        GraphQLError: the first validation error, when the query doesn't match the schema
+    """
+    parsed = gql(query)
+    schema = github_schema() if VALIDATE["enabled"] is not False else None
+    if schema is not None:
+        errors = validate_document(schema, parsed)
+        if errors:
+            raise errors[0]
+    return parsed
+
+
+@lru_cache(maxsize=None)
+def built_document(builder, *args):
+    """The parsed document for a query builder function and its arguments
+
+    Like pr_query.pr_timeline_pages_query with a PR count, building the query string is
+    skipped too once the document for those arguments exists
+    """
+    return document(builder(*args))
@@ -0,0 +1,116 @@
+# Record/replay transports for the GQLClient
+# responses from GitHub are recorded to a compressed fixture file, and can be replayed
+# from it later without a token or network, for reproducible profiling of the wrappers
+import gzip
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from gql.transport.exceptions import TransportQueryError
+from gql.transport.transport import Transport
+from graphql import ExecutionResult
+from graphql import print_ast
+
+FIXTURE_VERSION = 1
+# page sizes are tuned by the RequestScheduler while running, so they can differ between
+# recording and replaying, responses are matched on the other variables, like the cursor
+PAGE_SIZE_VARIABLES = ("blockCount", "membersCount")
+
+
+def fixture_key(document, variable_values=None):
+    """Key for a query document and its variables in a fixture file"""
+    variables = {
+        k: v for k, v in (variable_values or {}).items() if k not in PAGE_SIZE_VARIABLES
+    }
+    request = f"{print_ast(document)}\n{json.dumps(variables, sort_keys=True)}"
+    return hashlib.sha1(request.encode()).hexdigest()
+
+
+def read_fixture(fixture_path):
+    """dict of fixture keys to recorded responses, empty when there is no fixture file"""
+    try:
+        with gzip.open(fixture_path, "rt") as fixture_file:
+            fixture = json.load(fixture_file)
+    except FileNotFoundError:
+        return {}
+    return fixture["responses"]
+
+
+def write_fixture(fixture_path, responses):
+    """Write recorded responses, see fixture_response for their contents"""
+    Path(fixture_path).parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(fixture_path, "wt") as fixture_file:
+        json.dump({"version": FIXTURE_VERSION, "responses": responses}, fixture_file)
+
+
+def fixture_response(document, variable_values, data, errors=None):
+    """A recorded response, with the operation and variables for readability"""
+    return {
+        "operation": document.definitions[0].name.value,
+        "variables": variable_values or {},
+        "data": data,
+        "errors": errors,
+    }
+
+
+class RecordingTransport(Transport):
+    """Pass queries through to another transport, recording each response
+
+    Recorded responses are added to the fixture file when the transport is closed
+    """
+
+    def __init__(self, transport, fixture_path):
+        self.transport = transport
+        self.fixture_path = fixture_path
+        self.responses = {}
+        self._lock = threading.Lock()
+
+    def connect(self):
+        self.transport.connect()
+
+    def execute(self, document, variable_values=None, **kwargs):
+        result = self.transport.execute(
+            document, variable_values=variable_values, **kwargs
+        )
+        with self._lock:
+            self.responses[fixture_key(document, variable_values)] = fixture_response(
+                document, variable_values, result.data, result.errors
+            )
+        return result
+
+    def close(self):
+        self.transport.close()
+        with self._lock:
+            if self.responses:
+                write_fixture(
+                    self.fixture_path,
+                    {**read_fixture(self.fixture_path), **self.responses},
+                )
+
+
+class ReplayTransport(Transport):
+    """Answer queries from a recorded fixture file, without any network access"""
+
+    def __init__(self, fixture_path):
+        self.fixture_path = fixture_path
+        self.responses = {}
+
+    def connect(self):
+        # keep each response serialized, the wrappers modify the data they're given
+        self.responses = {
+            key: json.dumps(response)
+            for key, response in read_fixture(self.fixture_path).items()
+        }
+
+    def execute(self, document, variable_values=None, **kwargs):
+        try:
+            response = json.loads(
+                self.responses[fixture_key(document, variable_values)]
+            )
+        except KeyError:
+            raise TransportQueryError(
+                f"No recorded response in {self.fixture_path} for "
+                f"{document.definitions[0].name.value} with {variable_values}"
+            )
+        return ExecutionResult(data=response["data"], errors=response["errors"])
@@ -1,16 +1,17 @@
 # Importable strings for GQL queries
 
-org_teams_query = """query getReviewerTeams($organization: String!) {
+# a reviewer team's members, by the team's slug, one page of members at a time
+team_members_query = """query getTeamMembers($organization: String!, $team: String!, $membersCursor: String) {
   organization(login:$organization) {
-  	teams (first:100){
-      nodes {
-        name
-        members {
-          nodes {
-            login
-          }
+    team(slug:$team) {
+      name
+      members(first:100, after:$membersCursor) {
+        pageInfo {endCursor hasNextPage}
+        nodes {
+          login
         }
       }
     }
   }
+  rateLimit {cost remaining resetAt}
 }"""  # noqa
@@ -0,0 +1,71 @@
+# Local snapshot of GitHub's GQL schema
+# queries are validated against it, instead of fetching GitHub's schema by introspection
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from logzero import logger
+
+from config import METRICS_CACHE
+
+SCHEMA_FILE_NAME = "github_schema.graphql"
+# kept with the cached PR data by default, outside the installed package, see configure
+SCHEMA_PATH = METRICS_CACHE.joinpath(SCHEMA_FILE_NAME)
+# GitHub publishes the public schema as SDL
+SCHEMA_URL = "https://docs.github.com/public/fpt/schema.docs.graphql"
+# first line of the snapshot, identifies when and from what the snapshot was taken
+VERSION_HEADER = "# github-metrics schema snapshot: "
+# the snapshot read and written when no path is given
+SNAPSHOT = {"path": SCHEMA_PATH}
+
+
+def configure(path=SCHEMA_PATH):
+    """Set where the schema snapshot is read from and written to"""
+    SNAPSHOT["path"] = Path(path)
+
+
+def load_schema(path=None, required=False):
+    """SDL text of the schema snapshot, None when there is no snapshot
+
+    A missing snapshot is only warned about when it's required, validation was asked for
+    """
+    path = path or SNAPSHOT["path"]
+    try:
+        return Path(path).read_text()
+    except FileNotFoundError:
+        (logger.warning if required else logger.debug)(
+            f"No GitHub schema snapshot at {path}, queries will not be validated. "
+            "Run 'github-metrics update-schema' to download one."
+        )
+        return None
+
+
+def schema_version(path=None):
+    """The version header of the schema snapshot, None when there is no snapshot"""
+    path = path or SNAPSHOT["path"]
+    try:
+        with Path(path).open() as schema_file:
+            header = schema_file.readline().strip()
+    except FileNotFoundError:
+        return None
+    if not header.startswith(VERSION_HEADER):
+        return None
+    return header.replace(VERSION_HEADER, "", 1)
+
+
+def update_schema(path=None, url=SCHEMA_URL):
+    """Download the current public schema and write it as the snapshot
+
+    Returns:
+        the version string written in the snapshot header
+    """
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    version = (
+        f"{datetime.utcnow().isoformat(timespec='seconds')}Z "
+        f"etag={response.headers.get('ETag', 'none')}"
+    )
+    path = Path(path or SNAPSHOT["path"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"{VERSION_HEADER}{version}\n{response.text}")
+    return version
@@ -0,0 +1,277 @@
+"""
+Columnar engine for single_pr_metrics, instead of the PRWrapper properties
+
+All PRs' timeline events are loaded into numpy arrays, one element per event,
+and the review latencies and their statistics are calculated for every PR at once.
+The tables are the same as metrics_calculators.pr_review_metrics builds.
+
+numpy is an optional dependency, installed with the 'fast' extra
+"""
+
+import math
+from statistics import StatisticsError
+
+import attr
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError(
+        "The columnar metrics engine needs numpy, install it with: pip install -e .[fast]"
+    )
+
+from .GQL_Queries.github_wrappers import DraftWrapper
+from .GQL_Queries.github_wrappers import PRCommentWrapper
+from .GQL_Queries.github_wrappers import PRReviewWrapper
+from .GQL_Queries.github_wrappers import ReadyWrapper
+from .GQL_Queries.github_wrappers import SECONDS_TO_HOURS
+from .metrics_calculators import EMPTY
+from .metrics_calculators import LATENCY_HEADERS
+from .metrics_calculators import latency_sketches
+from .metrics_calculators import percentile_rows
+from .metrics_calculators import pr_metrics_row
+from .metrics_calculators import stat_metrics_rows
+
+# event type column values
+COMMENT, REVIEW, DRAFT, READY = range(4)
+EVENT_TYPES = {
+    PRCommentWrapper: COMMENT,
+    PRReviewWrapper: REVIEW,
+    DraftWrapper: DRAFT,
+    ReadyWrapper: READY,
+}
+# event time for PRs without a matching event
+NO_TIME = np.iinfo(np.int64).max
+
+
+@attr.s
+class PRColumns:
+    """Parallel arrays of PR and timeline event data
+
+    PR arrays are in the order of prs, event arrays are sorted by PR, then time.
+    Logins are stored as author ids, indexes into logins.
+    """
+
+    prs = attr.ib()
+    logins = attr.ib()
+    pr_author = attr.ib()
+    pr_created = attr.ib()
+    pr_draft = attr.ib()
+    event_pr = attr.ib()
+    event_type = attr.ib()
+    event_author = attr.ib()
+    event_time = attr.ib()
+    event_approved = attr.ib()
+
+    @classmethod
+    def from_prs(cls, prs):
+        """Load the PRWrapper instances and their timeline events into columns"""
+        login_ids = {}
+        event_pr, event_type, event_author, event_time, event_approved = (
+            [] for _ in range(5)
+        )
+        for row, pr in enumerate(prs):
+            for event in pr.timeline_events:
+                event_pr.append(row)
+                event_type.append(EVENT_TYPES[type(event)])
+                event_author.append(login_ids.setdefault(event.author, len(login_ids)))
+                event_time.append(event.created_ts)
+                event_approved.append(getattr(event, "state", None) == "APPROVED")
+        pr_author = [login_ids.setdefault(pr.author, len(login_ids)) for pr in prs]
+
+        event_pr = np.array(event_pr, dtype=np.int32)
+        event_time = np.array(event_time, dtype=np.int64)
+        # stable, so events at the same time keep their timeline order, like list.sort
+        order = np.lexsort((event_time, event_pr))
+        return cls(
+            prs=prs,
+            logins=list(login_ids),
+            pr_author=np.array(pr_author, dtype=np.int32),
+            pr_created=np.array([pr.created_ts for pr in prs], dtype=np.int64),
+            pr_draft=np.array([pr.is_draft for pr in prs], dtype=bool),
+            event_pr=event_pr[order],
+            event_type=np.array(event_type, dtype=np.int8)[order],
+            event_author=np.array(event_author, dtype=np.int32)[order],
+            event_time=event_time[order],
+            event_approved=np.array(event_approved, dtype=bool)[order],
+        )
+
+    def members(self, logins):
+        """bool array by author id, whether the login is in the logins set"""
+        return np.array([login in logins for login in self.logins], dtype=bool)
+
+    def first_time(self, mask):
+        """Time of each PR's first event selected by mask, NO_TIME if it has none"""
+        first = np.full(len(self.prs), NO_TIME, dtype=np.int64)
+        rows, first_index = np.unique(self.event_pr[mask], return_index=True)
+        first[rows] = self.event_time[mask][first_index]
+        return first
+
+    def authors_by_pr(self, mask):
+        """list of each PR's event author logins selected by mask, in event order"""
+        logins = np.array(self.logins, dtype=object)[self.event_author[mask]].tolist()
+        bounds = np.searchsorted(
+            self.event_pr[mask], np.arange(len(self.prs) + 1)
+        ).tolist()
+        return [logins[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def round_hours(seconds):
+    """Round seconds to hours with 1 decimal, exactly like round(hours, 1)
+
+    numpy rounds hours * 10 half to even, where round works on the exact value of hours,
+    so they can disagree on values ending in 5, those are rounded with round instead
+    """
+    hours = seconds / SECONDS_TO_HOURS
+    rounded = np.round(hours, 1)
+    ties = np.flatnonzero(np.isclose(hours * 10 % 1, 0.5))
+    rounded[ties] = [round(h, 1) for h in hours[ties].tolist()]
+    return rounded
+
+
+def latency_hours(end, start, valid):
+    """Rounded hours from start to end, 0 where not valid, shown as EMPTY like None"""
+    return np.where(valid, round_hours(end - start), 0.0)
+
+
+# vectorized statistics, named like the statistics functions for STAT_HEADERS
+def fmean(values):
+    if not len(values):
+        raise StatisticsError("fmean requires at least one data point")
+    return math.fsum(values) / len(values)
+
+
+def median(values):
+    if not len(values):
+        raise StatisticsError("no median for empty data")
+    return float(np.median(values))
+
+
+def pstdev(values):
+    if not len(values):
+        raise StatisticsError("pstdev requires at least one data point")
+    return math.sqrt(math.fsum((values - fmean(values)) ** 2) / len(values))
+
+
+def pr_review_metrics(prs, reviewer_index):
+    """Metrics and statistics tables for single_pr_metrics, calculated on PRColumns
+
+    Args:
+        prs: list of PRWrapper instances
+        reviewer_index: ReviewerIndex of the repo's reviewer tiers
+
+    Returns:
+        tuple of PR metrics and statistics tables, and latency sketches,
+        like metrics_calculators.pr_review_metrics
+    """
+    pr_metrics, latencies = pr_review_rows(prs, reviewer_index)
+    # 0 hours are shown as EMPTY, and left out of the statistics like it
+    return review_tables(
+        pr_metrics,
+        {
+            header: hours[hours != 0]
+            for header, hours in zip(LATENCY_HEADERS, latencies)
+        },
+    )
+
+
+def pr_metrics_from_rows(rows):
+    """Metrics and statistics tables for single_pr_metrics, from the PRs' table rows"""
+    pr_metrics = list(rows)
+    return review_tables(
+        pr_metrics,
+        {
+            header: np.array(
+                [row[header] for row in pr_metrics if row[header] != EMPTY],
+                dtype=np.float64,
+            )
+            for header in LATENCY_HEADERS
+        },
+    )
+
+
+def review_tables(pr_metrics, reported_hours):
+    """pr_review_metrics tables, from the rows and the reported hours of each latency"""
+    sketches = latency_sketches()
+    for header, hours in reported_hours.items():
+        sketches[header].update(hours.tolist())
+    stat_metrics = stat_metrics_rows(
+        *reported_hours.values(), stats=[fmean, median, pstdev]
+    ) + percentile_rows(sketches)
+
+    pr_metrics.sort(key=lambda n: n["PR"], reverse=True)  # sort by pr number
+    return pr_metrics, stat_metrics, sketches
+
+
+def pr_review_rows(prs, reviewer_index):
+    """single_pr_metrics table rows of the PRs, in their order, calculated on PRColumns
+
+    Returns:
+        tuple of the rows, and arrays of the hours to comment, tier1 and tier2
+    """
+    columns = PRColumns.from_prs(prs)
+    event_rows = columns.event_pr
+    # reviews_and_comments, reviews and comments not by the PR author
+    reviewed = np.isin(columns.event_type, (COMMENT, REVIEW)) & (
+        columns.event_author != columns.pr_author[event_rows]
+    )
+    by_tier1 = reviewed & columns.members(reviewer_index.tier1)[columns.event_author]
+    by_tier2 = reviewed & columns.members(reviewer_index.tier2)[columns.event_author]
+    non_tier = reviewed & ~(by_tier1 | by_tier2)
+
+    first_review = columns.first_time(reviewed)
+    first_tier1 = columns.first_time(by_tier1)
+    first_tier2 = columns.first_time(by_tier2)
+    first_tier1_approval = columns.first_time(by_tier1 & columns.event_approved)
+    ready = np.full(len(prs), NO_TIME, dtype=np.int64)
+    is_ready = columns.event_type == READY
+    np.minimum.at(ready, event_rows[is_ready], columns.event_time[is_ready])
+    ready = np.where(ready == NO_TIME, columns.pr_created, ready)
+    # comment_comparison_date, ready time if the first review was after it
+    comparison = np.where(first_review > ready, ready, columns.pr_created)
+
+    has_review = first_review != NO_TIME
+    has_tier1 = first_tier1 != NO_TIME
+    has_tier2 = first_tier2 != NO_TIME
+    hours_to_comment = latency_hours(
+        first_review, comparison, has_review & ~columns.pr_draft
+    )
+    hours_to_tier1 = latency_hours(first_tier1, comparison, has_tier1)
+    hours_to_tier2 = latency_hours(first_tier2, comparison, has_tier2)
+    hours_from_tier1_to_tier2 = latency_hours(
+        first_tier2, first_tier1_approval, (first_tier1_approval != NO_TIME) & has_tier2
+    )
+
+    pr_metrics = [
+        pr_metrics_row(
+            pr,
+            hours_to_comment=comment,
+            hours_to_tier1=tier1,
+            hours_to_tier2=tier2,
+            hours_from_tier1_to_tier2=tier1_to_tier2,
+            non_tier_reviewers=list(dict.fromkeys(non_tier_reviewers)),
+            tier1_reviewers=tier1_reviewers,
+            tier2_reviewers=tier2_reviewers,
+        )
+        for (
+            pr,
+            comment,
+            tier1,
+            tier2,
+            tier1_to_tier2,
+            non_tier_reviewers,
+            tier1_reviewers,
+            tier2_reviewers,
+        ) in zip(
+            prs,
+            hours_to_comment.tolist(),
+            hours_to_tier1.tolist(),
+            hours_to_tier2.tolist(),
+            hours_from_tier1_to_tier2.tolist(),
+            columns.authors_by_pr(non_tier),
+            columns.authors_by_pr(by_tier1),
+            columns.authors_by_pr(by_tier2),
+        )
+    ]
+
+    return pr_metrics, (hours_to_comment, hours_to_tier1, hours_to_tier2)
@@ -0,0 +1,135 @@
+# module for machine readable report files, typed records instead of the formatted tables
+import csv
+import io
+import json
+from datetime import date
+from datetime import datetime
+
+from .metrics_calculators import DATE_FMT
+from .metrics_calculators import EMPTY
+
+# file suffix of each output format besides html, see gh_metrics OUTPUT_FORMATS
+SUFFIXES = {"jsonl": ".jsonl", "csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+WEEK_SEPARATOR = " to "
+
+
+def column_name(header):
+    """snake_case column for a table header, like hours_to_comment for Hours to Comment"""
+    return header.lower().replace("-", "_").replace(" ", "_")
+
+
+def typed_record(row, **labels):
+    """Record of a table row, with snake_case columns, and None for empty cells"""
+    record = dict(labels)
+    for header, value in row.items():
+        record[column_name(header)] = None if value in (EMPTY, "") else value
+    return record
+
+
+def pr_metric_records(organization, repository, pr_metrics):
+    """Records of single_pr_metrics rows, with the PR number and line changes as ints"""
+    records = []
+    for row in pr_metrics:
+        record = typed_record(row, org=organization, repo=repository)
+        record["pr"] = int(record["pr"])
+        additions, deletions = record.pop("line_changes").split(" / ")
+        record["additions"] = int(additions.lstrip("+ "))
+        record["deletions"] = int(deletions.lstrip("- "))
+        records.append(record)
+    return records
+
+
+def week_dates(week):
+    """Start and end dates of a weekly table's Week cell, like 21-03-01 to 2021-03-07"""
+    start, end = week.split(WEEK_SEPARATOR)
+    return datetime.strptime(start, DATE_FMT).date(), date.fromisoformat(end)
+
+
+def reviewer_records(organization, repository, tier, weekly_table):
+    """Records of a tier's weekly reviewer table, one per week and reviewer with actions"""
+    records = []
+    for row in weekly_table:
+        week_start, week_end = week_dates(row["Week"])
+        for reviewer, actions in row.items():
+            if reviewer == "Week" or actions in (None, EMPTY):
+                continue
+            records.append(
+                {
+                    "org": organization,
+                    "repo": repository,
+                    "tier": tier,
+                    "week_start": week_start,
+                    "week_end": week_end,
+                    "reviewer": reviewer,
+                    "actions": actions,
+                }
+            )
+    return records
+
+
+def contributor_records(login, dated_counts):
+    """Records of a user's contribution counts, one per week, contribution type and repo
+
+    Args:
+        dated_counts: dict like metrics_calculators.dated_contribution_counts
+    """
+    records = []
+    for contribution_type, values in dated_counts.items():
+        if contribution_type == "week":
+            continue
+        for week_start, repo_counts in zip(dated_counts["week"], values):
+            for repository, count in repo_counts.items():
+                records.append(
+                    {
+                        "login": login,
+                        "week_start": week_start.date(),
+                        "contribution_type": contribution_type,
+                        "repo": repository,
+                        "count": count,
+                    }
+                )
+    return records
+
+
+def json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def render_records(records, output_format):
+    """The content of a report file with the records, str or bytes for the binary formats"""
+    if output_format == "jsonl":
+        return "".join(json.dumps(r, default=json_value) + "\n" for r in records)
+    if output_format == "csv":
+        content = io.StringIO()
+        writer = csv.DictWriter(
+            content,
+            fieldnames=list(dict.fromkeys(key for r in records for key in r)),
+            lineterminator="\n",
+        )
+        writer.writeheader()
+        writer.writerows(records)
+        return content.getvalue()
+    return render_arrow(records, output_format)
+
+
+def render_arrow(records, output_format):
+    """Parquet, or arrow IPC file, bytes of the records, with pyarrow's inferred types"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            f"The {output_format} output format needs pyarrow, "
+            "install it with: pip install -e .[export]"
+        )
+
+    table = pyarrow.Table.from_pylist(records)
+    sink = pyarrow.BufferOutputStream()
+    if output_format == "parquet":
+        pyarrow.parquet.write_table(table, sink)
+    else:
+        with pyarrow.ipc.new_file(sink, table.schema) as ipc_writer:
+            ipc_writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -1,8 +1,81 @@
 # module to handle file IO functions, to keep them out of the click command module
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import attr
+
 from config import METRICS_OUTPUT
 
+OUTPUT_WRITERS = 4
+
+
+def current_umask():
+    # os.umask can only be read by setting it, done once at import, before any writer threads
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# mode of new output files, like open() would create them, mkstemp makes them owner-only
+OUTPUT_FILE_MODE = 0o666 & ~current_umask()
+
 
 def write_to_output(output_filename, content):
-    """output_filename should be a pathlib Path object"""
+    """output_filename should be a pathlib Path object, content str, or bytes
+
+    Written to a temporary file that's renamed over output_filename,
+    so a reader never sees a partly written file.
+    It keeps the mode of the file it replaces, or gets OUTPUT_FILE_MODE
+    """
     METRICS_OUTPUT.mkdir(parents=True, exist_ok=True)
-    output_filename.write_text(content)
+    output_filename.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(
+        dir=output_filename.parent, prefix=f".{output_filename.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb" if isinstance(content, bytes) else "w") as temp_file:
+            try:
+                mode = output_filename.stat().st_mode & 0o777
+            except FileNotFoundError:
+                mode = OUTPUT_FILE_MODE
+            os.fchmod(temp_file.fileno(), mode)
+            temp_file.write(content)
+        os.replace(temp_name, output_filename)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+@attr.s
+class OutputWriter:
+    """Background pool writing output files with write_to_output
+
+    Use as a context manager, leaving it waits for the writes and raises the first error,
+    unless it's left with an exception already.
+    render is called in the pool too, so rendering the file content overlaps the I/O
+    output_format is the format the report files are rendered in, html or one of exports.SUFFIXES
+    """
+
+    max_workers = attr.ib(default=OUTPUT_WRITERS)
+    output_format = attr.ib(default="html")
+    _executor = attr.ib(default=None, init=False, repr=False)
+    _futures = attr.ib(factory=list, init=False, repr=False)
+
+    def __enter__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="output-writer"
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._executor.shutdown(wait=True)
+        if exc_type is None:
+            for future in self._futures:
+                future.result()
+
+    def write(self, output_filename, render):
+        """Render the content and write it to output_filename, in the background"""
+        self._futures.append(
+            self._executor.submit(lambda: write_to_output(output_filename, render()))
+        )
@@ -1,4 +1,6 @@
+from collections import Counter
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from datetime import datetime
 from datetime import timedelta
@@ -9,11 +11,21 @@ from statistics import pstdev
 from box import Box
 from dateutil.rrule import rrule
 from dateutil.rrule import WEEKLY
+from logzero import logger
 
+from .GQL_Queries.github_wrappers import MERGED
+from .GQL_Queries.github_wrappers import OPENED
+from .GQL_Queries.github_wrappers import OrgWrapper
 from .GQL_Queries.github_wrappers import RepoWrapper
+from .GQL_Queries.github_wrappers import reviewer_team_slugs
 from .GQL_Queries.github_wrappers import UserWrapper
+from .sketches import QuantileSketch
 
 EMPTY = "---"
+# part of the journaled metric rows' fingerprint, bump it when pr_metrics_row changes
+METRIC_ROWS_VERSION = 1
+
+ENGINES = ["python", "columnar"]
 
 DATE_FMT = "%y-%m-%d"
 
@@ -27,6 +39,16 @@ STAT_HEADERS = {
     "pstdev": "Pop. Standard Deviation",
 }
 
+TIERS = ["tier1", "tier2"]
+
+# latency columns with percentiles, estimated from mergeable QuantileSketches
+LATENCY_HEADERS = [HEADER_H_COM, HEADER_H_T1, HEADER_H_T2]
+PERCENTILES = {
+    "50th Percentile": 0.5,
+    "90th Percentile": 0.9,
+    "99th Percentile": 0.99,
+}
+
 """
 Functions for collecting and organizing various timing metrics.
 
@@ -44,7 +66,36 @@ class PullRequestMetrics(Box):
     pass
 
 
-def single_pr_metrics(organization, repository, pr_count=100):
+def metrics_by_repo(metrics_function, repositories, concurrency=1, **kwargs):
+    """Collect metrics for multiple repositories in parallel on a thread pool
+
+    Args:
+        metrics_function: function taking a repository kwarg, like single_pr_metrics
+        repositories: iterable of repository names
+        concurrency: maximum number of repositories collected at the same time
+        kwargs: passed through to every metrics_function call
+
+    Yields:
+        tuples of repository name and metrics_function result, in the order of repositories
+        as soon as that repository and all before it have been collected
+    """
+    repositories = list(repositories)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = executor.map(
+            lambda repository: metrics_function(repository=repository, **kwargs),
+            repositories,
+        )
+        yield from zip(repositories, results)
+
+
+def single_pr_metrics(
+    organization,
+    repository,
+    pr_count=100,
+    pr_cache=None,
+    pr_window=None,
+    engine="python",
+):
     """Iterate over the PRs in the repo and calculate times to the first comment
 
     Calculates the time delta per-PR from creation to comment, and from 'review' label to comment
@@ -52,61 +103,228 @@ def single_pr_metrics(organization, repository, pr_count=100):
     Args:
         organization: string organization or repository owner  (ex. SatelliteQE)
         repo_name: string repository name (ex. robottelo)
+        pr_cache: PRNodeCache to refresh and read PR data from, None to fetch every PR
+            without a pr_window, only the PRs changed since the last run are calculated
+        pr_window: PRWindow to collect the PRs in, instead of the latest pr_count PRs
+        engine: one of ENGINES, 'columnar' calculates with numpy arrays instead of
+            the PRWrapper properties, for large numbers of PRs
 
     Returns:
         tuple of
         dict, keyed on the PR number, where values are dictionaries containing timing metrics
         dict, keyed with table headers, of statistical values
+        dict of QuantileSketch for each of LATENCY_HEADERS, see merge_latency_sketches
 
     """
-    repo = RepoWrapper(organization, repository)
-    pr_metrics = []
-    for pr in repo.pull_requests(count=pr_count).values():
-        pr_state = pr.state
-        if pr_state == "OPEN":
-            pr_state = f"{pr_state}{' - DRAFT' if pr.is_draft else ''}"
-        pr_metrics.append(
-            {
-                "PR": pr.number,
-                "Author": pr.author,
-                "State": pr_state,
-                "Files": pr.changed_files,
-                "Line Changes": f"+ {pr.additions} / - {pr.deletions}",
-                HEADER_H_COM: pr.hours_to_first_review or EMPTY,
-                HEADER_H_T1: pr.hours_to_tier1 or EMPTY,
-                HEADER_H_T2: pr.hours_to_tier2 or EMPTY,
-                "Tier1 to Tier2": pr.hours_from_tier1_to_tier2 or EMPTY,
-                "Non-Tier Reviewers": ", ".join(pr.reviews_by_non_tier) or EMPTY,
-                "Tier1 Reviewers": ", ".join(
-                    set([r.author for r in pr.reviews_by_tier1])
-                ),
-                "Tier2 Reviewers": ", ".join(
-                    set([r.author for r in pr.reviews_by_tier2])
-                ),
-                "Merged By": pr.merged_by,
-            }
-        )
+    repo = RepoWrapper(organization, repository, pr_cache=pr_cache)
+    if pr_cache is not None and pr_window is None:
+        return journaled_pr_metrics(repo, pr_count, engine)
+    return pr_metrics_tables(
+        repo, repo.iter_pull_requests(count=pr_count, pr_window=pr_window), engine
+    )
+
+
+def pr_metrics_tables(repo, prs, engine="python"):
+    """single_pr_metrics tables for the repo's PRs, calculated with the given engine"""
+    if engine == "columnar":
+        from . import columnar_metrics  # numpy is optional
+
+        return columnar_metrics.pr_review_metrics(list(prs), repo.reviewer_index)
+    return pr_review_metrics(prs)
+
+
+def pr_metrics_rows(repo, prs, engine="python"):
+    """single_pr_metrics table rows of the repo's PRs, calculated with the given engine"""
+    if engine == "columnar":
+        from . import columnar_metrics  # numpy is optional
+
+        return columnar_metrics.pr_review_rows(prs, repo.reviewer_index)[0]
+    return [pr_review_row(pr) for pr in prs]
 
-    # calculate some column averages
-    hours_to_comment = [p[HEADER_H_COM] for p in pr_metrics if p[HEADER_H_COM] != EMPTY]
-    hours_to_tier1 = [p[HEADER_H_T1] for p in pr_metrics if p[HEADER_H_T1] != EMPTY]
-    hours_to_tier2 = [p[HEADER_H_T2] for p in pr_metrics if p[HEADER_H_T2] != EMPTY]
-    stat_metrics = []
-    for stat in [fmean, median, pstdev]:
-        stat_metrics.append(
-            {
-                "Metric": STAT_HEADERS[stat.__name__],
-                HEADER_H_COM: stat(hours_to_comment),
-                HEADER_H_T1: stat(hours_to_tier1),
-                HEADER_H_T2: stat(hours_to_tier2),
-            }
-        )
+
+def pr_review_metrics(prs):
+    """Metrics and statistics tables for single_pr_metrics, from the PRWrapper properties
+
+    prs can be a stream like RepoWrapper.iter_pull_requests, each PR is only kept
+    as its table row, and the statistics columns and sketches are fed along the way
+    """
+    return pr_metrics_from_rows(pr_review_row(pr) for pr in prs)
+
+
+def pr_review_row(pr):
+    """single_pr_metrics table row for a PR, from the PRWrapper properties"""
+    return pr_metrics_row(
+        pr,
+        hours_to_comment=pr.hours_to_first_review,
+        hours_to_tier1=pr.hours_to_tier1,
+        hours_to_tier2=pr.hours_to_tier2,
+        hours_from_tier1_to_tier2=pr.hours_from_tier1_to_tier2,
+        non_tier_reviewers=pr.reviews_by_non_tier,
+        tier1_reviewers=[r.author for r in pr.reviews_by_tier1],
+        tier2_reviewers=[r.author for r in pr.reviews_by_tier2],
+    )
+
+
+def pr_metrics_from_rows(rows):
+    """Metrics and statistics tables for single_pr_metrics, from the PRs' table rows"""
+    pr_metrics = []
+    reported_hours = {header: [] for header in LATENCY_HEADERS}
+    sketches = latency_sketches()
+    for row in rows:
+        pr_metrics.append(row)
+        # calculate some column averages
+        for header in LATENCY_HEADERS:
+            if row[header] != EMPTY:
+                reported_hours[header].append(row[header])
+                sketches[header].add(row[header])
+
+    stat_metrics = stat_metrics_rows(
+        *reported_hours.values(), stats=[fmean, median, pstdev]
+    ) + percentile_rows(sketches)
 
     pr_metrics.sort(key=lambda n: n["PR"], reverse=True)  # sort by pr number
-    return pr_metrics, stat_metrics
+    return pr_metrics, stat_metrics, sketches
+
 
+def journaled_pr_metrics(repo, pr_count=100, engine="python", prs=None):
+    """single_pr_metrics tables from the PR cache's journal of metric rows
 
-def reviewer_actions(organization, repository, pr_count=100):
+    Only the PRs updated since their row was journaled are wrapped and calculated,
+    the rows of every other PR are read back as they were stored.
+    Rows are journaled with the reviewer teams' fingerprint, a team change recalculates them.
+    With prs, the PRs already read by repo.iter_pull_requests, the cache was refreshed
+    by reading them, and the changed PRs are taken from them instead of wrapped again.
+    """
+    pr_cache = repo.pr_cache
+    org_repo = (repo.organization, repo.repo_name)
+    fingerprint = f"{METRIC_ROWS_VERSION}:{repo.reviewer_teams_fingerprint}"
+    if prs is None:
+        repo.refresh_pr_cache(count=pr_count)
+    versions = pr_cache.pr_versions(*org_repo, pr_count)
+    rows = pr_cache.metric_rows(*org_repo, fingerprint, versions)
+    changed = [
+        (number, updated_at) for number, updated_at in versions if number not in rows
+    ]
+    if changed:
+        changed_numbers = {number for number, _ in changed}
+        if prs is None:
+            changed_prs = map(
+                repo.wrap_pr_node,
+                pr_cache.pr_nodes_by_number(*org_repo, changed_numbers),
+            )
+        else:
+            changed_prs = (pr for pr in prs if int(pr.number) in changed_numbers)
+        calculated = {
+            int(row["PR"]): row
+            for row in pr_metrics_rows(
+                repo, [pr for pr in changed_prs if pr is not None], engine
+            )
+        }
+        # ignored PRs are journaled without a row, so they aren't wrapped again either
+        changed_rows = [
+            (number, updated_at, calculated.get(number))
+            for number, updated_at in changed
+        ]
+        pr_cache.store_metric_rows(*org_repo, fingerprint, changed_rows)
+        rows.update((number, row) for number, _, row in changed_rows)
+    logger.debug(
+        f"PR metrics for {repo.organization}/{repo.repo_name}: calculated {len(changed)} "
+        f"of {len(versions)} PRs"
+    )
+    rows = [rows[number] for number, _ in versions if rows[number] is not None]
+    if engine == "columnar":
+        from . import columnar_metrics  # numpy is optional
+
+        return columnar_metrics.pr_metrics_from_rows(rows)
+    return pr_metrics_from_rows(rows)
+
+
+def pr_metrics_row(
+    pr,
+    hours_to_comment,
+    hours_to_tier1,
+    hours_to_tier2,
+    hours_from_tier1_to_tier2,
+    non_tier_reviewers,
+    tier1_reviewers,
+    tier2_reviewers,
+):
+    """single_pr_metrics table row for a PR, from its calculated review metrics
+
+    None or 0 hours are shown as EMPTY, reviewer lists are logins in review order,
+    each login is listed once in the order they first reviewed
+    """
+    pr_state = pr.state
+    if pr_state == "OPEN":
+        pr_state = f"{pr_state}{' - DRAFT' if pr.is_draft else ''}"
+    return {
+        "PR": pr.number,
+        "Author": pr.author,
+        "State": pr_state,
+        "Files": pr.changed_files,
+        "Line Changes": f"+ {pr.additions} / - {pr.deletions}",
+        HEADER_H_COM: hours_to_comment or EMPTY,
+        HEADER_H_T1: hours_to_tier1 or EMPTY,
+        HEADER_H_T2: hours_to_tier2 or EMPTY,
+        "Tier1 to Tier2": hours_from_tier1_to_tier2 or EMPTY,
+        "Non-Tier Reviewers": ", ".join(non_tier_reviewers) or EMPTY,
+        "Tier1 Reviewers": ", ".join(dict.fromkeys(tier1_reviewers)),
+        "Tier2 Reviewers": ", ".join(dict.fromkeys(tier2_reviewers)),
+        "Merged By": pr.merged_by,
+    }
+
+
+def stat_metrics_rows(hours_to_comment, hours_to_tier1, hours_to_tier2, stats):
+    """single_pr_metrics statistics table, stats are functions named like STAT_HEADERS"""
+    return [
+        {
+            "Metric": STAT_HEADERS[stat.__name__],
+            HEADER_H_COM: stat(hours_to_comment),
+            HEADER_H_T1: stat(hours_to_tier1),
+            HEADER_H_T2: stat(hours_to_tier2),
+        }
+        for stat in stats
+    ]
+
+
+def latency_sketches():
+    """dict of empty QuantileSketch for each of LATENCY_HEADERS"""
+    return {header: QuantileSketch() for header in LATENCY_HEADERS}
+
+
+def merge_latency_sketches(sketches_list):
+    """Merge latency sketches from multiple repos, for org-wide percentiles"""
+    merged = latency_sketches()
+    for sketches in sketches_list:
+        for header, sketch in sketches.items():
+            merged[header].merge(sketch)
+    return merged
+
+
+def percentile_rows(sketches):
+    """Statistics table rows of the PERCENTILES, estimated from latency sketches
+
+    Estimates are within the sketches' relative accuracy, empty sketches have no value
+    """
+    return [
+        {
+            "Metric": name,
+            **{header: sketches[header].quantile(q) for header in LATENCY_HEADERS},
+        }
+        for name, q in PERCENTILES.items()
+    ]
+
+
+def reviewer_actions(
+    organization,
+    repository,
+    pr_count=100,
+    pr_cache=None,
+    pr_window=None,
+    rollup=None,
+    rollup_weeks=None,
+    fetch=True,
+):
     """Collect metrics around reviewer activity in a given organization
 
     Gets list of members from GH organization teams, pulled from config
@@ -114,76 +332,281 @@ def reviewer_actions(organization, repository, pr_count=100):
     Organize metrics by:
         - given reviewer teams, and reviews by non-team members
         - within teams, number of reviews per reviewer
+
+    With a ReviewerRollup, the fetched PRs update it and the tables are read from it,
+    for the weeks of the fetched PRs, or the last rollup_weeks weeks when given,
+    up to the pr_window's until week.
+    Without fetch, the tables come from the rollup alone.
     """
-    repo = RepoWrapper(organization, repository)
-    team_actions = repo.reviewer_team_actions(pr_count=pr_count)
-    tier1_actions = team_actions.pop("tier1")
-    tier2_actions = team_actions.pop("tier2")
+    if rollup is None:
+        repo = RepoWrapper(organization, repository, pr_cache=pr_cache)
+        return weekly_reviewer_tables(
+            repo.reviewer_team_actions(pr_count=pr_count, pr_window=pr_window)
+        )
+    prs = []
+    if fetch:
+        repo = RepoWrapper(organization, repository, pr_cache=pr_cache)
+        prs = list(repo.iter_pull_requests(count=pr_count, pr_window=pr_window))
+    return rollup_reviewer_tables(
+        rollup,
+        organization,
+        repository,
+        prs,
+        rollup_weeks,
+        window_until_week(pr_window),
+    )
+
+
+def all_repo_metrics(
+    organization,
+    repository,
+    pr_count=100,
+    pr_cache=None,
+    pr_window=None,
+    engine="python",
+    rollup=None,
+):
+    """single_pr_metrics and reviewer_actions for a repo, from a single fetch of its PRs
+
+    The PRs are kept in memory, and their review classification is shared by both.
+    With a pr_cache and no pr_window, the PR tables come from the journal of metric rows,
+    like single_pr_metrics, only calculating the changed PRs.
 
-    # split actions into weekly blocks to show review/comment actions over time
-    # want to create list of dictionaries
-    # first item is the week
-    # columns are individuals with count of reviews in that week
+    Returns:
+        tuple of the single_pr_metrics tables and the reviewer_actions tables
+    """
+    repo = RepoWrapper(organization, repository, pr_cache=pr_cache)
+    prs = list(repo.iter_pull_requests(count=pr_count, pr_window=pr_window))
+    return (
+        (
+            journaled_pr_metrics(repo, pr_count, engine, prs=prs)
+            if pr_cache is not None and pr_window is None
+            else pr_metrics_tables(repo, prs, engine)
+        ),
+        (
+            weekly_reviewer_tables(repo.reviewer_team_actions(prs=prs))
+            if rollup is None
+            else rollup_reviewer_tables(
+                rollup,
+                organization,
+                repository,
+                prs,
+                until_week=window_until_week(pr_window),
+            )
+        ),
+    )
+
+
+def weekly_reviewer_tables(team_actions):
+    """Tier1 and tier2 tables of reviewer action counts by week, for reviewer_actions
+
+    Args:
+        team_actions: dict of tier1/tier2 actions, like RepoWrapper.reviewer_team_actions
+    """
+    return weekly_tables(team_actions_by_week(team_actions))
 
-    # go through t1 actions, create new dict keyed by tuple of year,week
-    t1_by_week = defaultdict(lambda: defaultdict(int))
-    for reviewer, actions in tier1_actions.items():
-        for action in actions:
-            t1_by_week[action[0].isocalendar()[0:2]][reviewer] += 1
 
-    t2_by_week = defaultdict(lambda: defaultdict(int))
-    for reviewer, actions in tier2_actions.items():
-        for action in actions:
-            t2_by_week[action[0].isocalendar()[0:2]][reviewer] += 1
+def team_actions_by_week(team_actions):
+    """Counts of reviewer actions by tier, week and reviewer, for weekly_tables"""
+    # split actions into weekly blocks to show review/comment actions over time
+    # go through each tier's actions, create new dict keyed by tuple of year,week
+    # columns are individuals with count of reviews in that week
+    by_week = {tier: defaultdict(lambda: defaultdict(int)) for tier in TIERS}
+    for tier in TIERS:
+        for reviewer, actions in team_actions[tier].items():
+            for action in actions:
+                by_week[tier][action[0].isocalendar()[0:2]][reviewer] += 1
+    return by_week
+
+
+def rollup_reviewer_tables(
+    rollup, organization, repository, prs, rollup_weeks=None, until_week=None
+):
+    """Update the rollup with the PRs, and read the weekly_reviewer_tables from it"""
+    return weekly_tables(
+        rollup_by_week(rollup, organization, repository, prs, rollup_weeks, until_week)
+    )
+
+
+def window_until_week(pr_window):
+    """(ISO year, ISO week) of the PRWindow's until date, None when it's open ended"""
+    if pr_window is None or pr_window.until is None:
+        return None
+    return pr_window.until.isocalendar()[0:2]
+
+
+def rollup_by_week(
+    rollup, organization, repository, prs, rollup_weeks=None, until_week=None
+):
+    """Update the rollup with the PRs, and read its counts by tier, week and reviewer
+
+    The counts cover the weeks since the oldest PR was opened,
+    or the last rollup_weeks weeks, or every week in the rollup when neither is known,
+    up to until_week, or the latest week in the rollup without it
+    """
+    rollup.update(organization, repository, prs)
+    since_week = None
+    if rollup_weeks:
+        since_week = (date.today() - timedelta(weeks=rollup_weeks)).isocalendar()[0:2]
+    elif prs:
+        since_week = min(pr.created_at for pr in prs).isocalendar()[0:2]
+
+    by_week = {tier: defaultdict(dict) for tier in TIERS}
+    for tier, week, reviewer, count in rollup.weekly_counts(
+        organization, repository, since_week=since_week, until_week=until_week
+    ):
+        by_week[tier][week][reviewer] = count
+    return by_week
+
+
+def org_reviewer_actions(
+    organization,
+    pr_count=100,
+    pr_cache=None,
+    pr_window=None,
+    rollup=None,
+    rollup_weeks=None,
+    fetch=True,
+    concurrency=1,
+):
+    """Reviewer action tables combined across the org's repos, with a per-repo breakdown
+
+    Covers the org's repos with reviewer teams in settings, see reviewer_team_slugs,
+    or without fetch, the org's repos already in the rollup.
+    Arguments are like reviewer_actions, see org_pull_requests for how PRs are fetched.
 
-    t1_metrics = []
-    for week, actions in t1_by_week.items():
-        t1_metrics.append(
+    Returns:
+        tuple of the org's tier1 and tier2 tables, like reviewer_actions,
+        and a table of each repo's action counts
+    """
+    if fetch:
+        repositories = [
+            r
+            for r in OrgWrapper(organization).repositories()
+            if reviewer_team_slugs(organization, r)
+        ]
+        prs_by_repo = org_pull_requests(
+            organization, repositories, pr_count, pr_cache, pr_window, concurrency
+        )
+    else:
+        prs_by_repo = {r: [] for r in rollup.repositories(organization)}
+
+    org_by_week = {tier: defaultdict(lambda: defaultdict(int)) for tier in TIERS}
+    repo_breakdown = []
+    for repository, prs in prs_by_repo.items():
+        if rollup is None:
+            by_week = team_actions_by_week(
+                RepoWrapper(organization, repository).reviewer_team_actions(prs=prs)
+            )
+        else:
+            by_week = rollup_by_week(
+                rollup,
+                organization,
+                repository,
+                prs,
+                rollup_weeks,
+                window_until_week(pr_window),
+            )
+        action_counts = {tier: Counter() for tier in TIERS}
+        for tier in TIERS:
+            for week, counts in by_week[tier].items():
+                for reviewer, count in counts.items():
+                    org_by_week[tier][week][reviewer] += count
+                    action_counts[tier][reviewer] += count
+        repo_breakdown.append(
             {
-                "Week": f"{date.fromisocalendar(week[0], week[1], 1).strftime(DATE_FMT)} to "
-                f"{date.fromisocalendar(week[0], week[1], 7)}",
-                **actions,
+                "Repository": repository,
+                "Tier1 Actions": sum(action_counts["tier1"].values())
+                - action_counts["tier1"][OPENED],
+                "Tier2 Actions": sum(action_counts["tier2"].values())
+                - action_counts["tier2"][MERGED],
+                "PRs Opened": action_counts["tier1"][OPENED],
+                "PRs Merged": action_counts["tier2"][MERGED],
             }
         )
-    t2_metrics = []
-    for week, actions in t2_by_week.items():
-        t2_metrics.append(
+    return (*weekly_tables(org_by_week), repo_breakdown)
+
+
+def org_pull_requests(
+    organization,
+    repositories,
+    pr_count=100,
+    pr_cache=None,
+    pr_window=None,
+    concurrency=1,
+):
+    """Lists of PRWrapper instances for each of the org's repos, keyed on repo name
+
+    The newest pr_count PRs of every repo are fetched together in multi-repo queries,
+    see OrgWrapper.iter_repo_pr_pages, and added to the pr_cache without a sync.
+    With a pr_window each repo is searched on its own, concurrency repos at a time.
+    """
+    repos = {r: RepoWrapper(organization, r, pr_cache=pr_cache) for r in repositories}
+    if pr_window is not None:
+        return dict(
+            metrics_by_repo(
+                lambda repository: list(
+                    repos[repository].iter_pull_requests(pr_window=pr_window)
+                ),
+                repositories=repositories,
+                concurrency=concurrency,
+            )
+        )
+
+    prs_by_repo = {r: [] for r in repositories}
+    for repository, pr_nodes in OrgWrapper(organization).iter_repo_pr_pages(
+        repositories, count=pr_count
+    ):
+        if pr_cache is not None:
+            # not every PR updated since the last sync, keep the watermark where it was
+            pr_cache.store(organization, repository, pr_nodes, advance_sync=False)
+        wrapped = map(repos[repository].wrap_pr_node, pr_nodes)
+        prs_by_repo[repository].extend(pr for pr in wrapped if pr is not None)
+    return prs_by_repo
+
+
+def weekly_tables(by_week):
+    """Tier1 and tier2 tables, newest week first, from counts by tier, week and reviewer"""
+    tables = []
+    for tier in TIERS:
+        metrics = [
             {
                 "Week": f"{date.fromisocalendar(week[0], week[1], 1).strftime(DATE_FMT)} to "
                 f"{date.fromisocalendar(week[0], week[1], 7)}",
-                **actions,
+                **counts,
             }
-        )
+            for week, counts in by_week[tier].items()
+        ]
+        metrics.sort(key=lambda m: m["Week"], reverse=True)
+        tables.append(metrics)
+    return tuple(tables)
 
-    t1_metrics.sort(key=lambda m: m["Week"], reverse=True)
-    t2_metrics.sort(key=lambda m: m["Week"], reverse=True)
-    return t1_metrics, t2_metrics
 
-
-def contributor_actions(user, num_weeks):
-    """
-    Gather metrics for contributions by week for members of an organization team
-
-    Query will include PR, issue, PR review, and commit contributions by repository, by week
-
-    Iterate over weekly recurrance queries
-
-    Data returned is ready for tabulate with headers=keys
-    Organize metrics by type of action, first column is week, finally by repository
-    """
-    userwrap = UserWrapper(login=user)
-    dated_counts = defaultdict(list)
+def weekly_windows(num_weeks):
+    """list of (from, to) datetime tuples for each week, from num_weeks ago to now"""
     now = datetime.now()
     starting_date = now - timedelta(weeks=num_weeks)
     # rrule will create a list of start/stop times for weekly interval
     datelist = rrule(WEEKLY, until=now, dtstart=starting_date)
-    # iterate over sets of start/stop by zipping the list against itself
+    # zip the list against itself for sets of start/stop
     # relying on python to keep these list items in order.
-    for from_date, to_date in zip(datelist, datelist[1:]):
+    return list(zip(datelist, datelist[1:]))
 
-        user_contributions = userwrap.contributions(
-            from_date=from_date, to_date=to_date
-        )
+
+def dated_contribution_counts(windows, window_counts):
+    """Arrange flattened contribution counts for each window into table columns
+
+    Args:
+        windows: list of (from, to) datetime tuples
+        window_counts: list of flattened contribution counts, one per window,
+            None for a window without counts, like a team member's weeks before joining
+
+    Returns:
+        dict keyed on 'week' and contribution type, with a value per window,
+        the window's from datetime or its counts by repo, see contribution_table
+    """
+    dated_counts = {"week": [from_date for from_date, _ in windows]}
+    for index, user_contributions in enumerate(window_counts):
         # {'pullRequest': {'repo-metrics': 1},
         #  'pullRequestReview': {'robottelo': 1},
         #  'issue': {},
@@ -193,15 +616,60 @@ def contributor_actions(user, num_weeks):
         # {'week': [from0, from1, from2]
         #  'pullRequest': [{'repo': 1}, {}, {'other': 2}]}
 
-        dated_counts["week"].append(from_date.strftime(DATE_FMT))
-
-        for cont_type, cont_repos in user_contributions.items():
-            # Convert the raw value dicts to table cell values
-            if cont_repos:
-                dated_counts[cont_type].append(
-                    "\n".join(f"{r}: {c}" for r, c in cont_repos.items())
-                )
-            else:
-                dated_counts[cont_type].append("---")
+        for cont_type, cont_repos in (user_contributions or {}).items():
+            type_counts = dated_counts.setdefault(cont_type, [{} for _ in windows])
+            type_counts[index] = cont_repos
 
     return dated_counts
+
+
+def contribution_table(dated_counts):
+    """Table cell values of dated_contribution_counts, ready for tabulate with headers=keys"""
+    table = {
+        "week": [from_date.strftime(DATE_FMT) for from_date in dated_counts["week"]]
+    }
+    for cont_type, values in dated_counts.items():
+        if cont_type == "week":
+            continue
+        # Convert the raw value dicts to table cell values
+        table[cont_type] = [
+            "\n".join(f"{r}: {c}" for r, c in cont_repos.items()) or "---"
+            for cont_repos in values
+        ]
+    return table
+
+
+def contributor_actions(user, num_weeks):
+    """
+    Gather metrics for contributions by week for members of an organization team
+
+    Query will include PR, issue, PR review, and commit contributions by repository, by week
+
+    Iterate over weekly recurrance windows, fetched in batched queries
+
+    Data returned is ready for contribution_table
+    Organize metrics by type of action, first column is week, finally by repository
+    """
+    userwrap = UserWrapper(login=user)
+    windows = weekly_windows(num_weeks)
+    return dated_contribution_counts(windows, userwrap.contributions_by_window(windows))
+
+
+def team_contributor_actions(organization, team, num_weeks):
+    """Gather contributions by week for every member of an organization team
+
+    Counts for all team members are fetched together, several weeks in each query,
+    instead of querying each member separately like contributor_actions.
+    A member who joined or left partway through has empty counts for the other weeks.
+
+    Returns:
+        dict keyed on member login, values like contributor_actions
+    """
+    windows = weekly_windows(num_weeks)
+    member_counts = OrgWrapper(name=organization).team_contributions(
+        team=team, windows=windows
+    )
+    return {
+        member: dated_contribution_counts(windows, window_counts)
+        for member, window_counts in member_counts.items()
+    }
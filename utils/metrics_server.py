@@ -0,0 +1,158 @@
+# module for the serve command, keeping the report tables in memory and serving them over HTTP
+import hashlib
+import json
+import threading
+from datetime import datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import attr
+from logzero import logger
+
+# Retry-After for requests made before the first refresh finished
+NOT_READY_RETRY_SECONDS = 10
+JSON_CONTENT_TYPE = "application/json"
+
+
+@attr.s(frozen=True)
+class Resource:
+    """A response body with its content type, and an ETag for conditional requests"""
+
+    body = attr.ib()
+    content_type = attr.ib(default=JSON_CONTENT_TYPE)
+    etag = attr.ib()
+
+    @etag.default
+    def _etag(self):
+        return f'"{hashlib.sha1(self.body).hexdigest()}"'
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(body=json.dumps(data).encode())
+
+
+@attr.s
+class MetricsDataset:
+    """Resources served by the MetricsServer, keyed on their path
+
+    Each refresh replaces the resources it collected, and the index at /,
+    the other resources are kept as they were.
+    """
+
+    refreshed_at = attr.ib(default=None)
+    _resources = attr.ib(factory=dict, repr=False)
+    _lock = attr.ib(factory=threading.Lock, repr=False)
+
+    @property
+    def ready(self):
+        return self.refreshed_at is not None
+
+    def get(self, path):
+        """The resource at path, None when there's none"""
+        with self._lock:
+            return self._resources.get(path)
+
+    def update(self, resources):
+        """Replace resources, a dict of Resource or JSON data keyed on path"""
+        resources = {
+            path: r if isinstance(r, Resource) else Resource.from_json(r)
+            for path, r in resources.items()
+        }
+        refreshed_at = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            self._resources.update(resources)
+            self._resources["/"] = Resource.from_json(
+                {
+                    "refreshed_at": refreshed_at,
+                    "paths": sorted(p for p in self._resources if p != "/"),
+                }
+            )
+            self.refreshed_at = refreshed_at
+
+
+@attr.s
+class Refresher:
+    """Thread updating the dataset from collect() now, then every interval seconds
+
+    A failed collect is logged, even one exiting, and the dataset keeps serving
+    the previous resources
+    """
+
+    dataset = attr.ib()
+    collect = attr.ib()
+    interval = attr.ib()
+    _stopped = attr.ib(factory=threading.Event, repr=False)
+    _thread = attr.ib(default=None, repr=False)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.dataset.update(self.collect())
+            except (Exception, SystemExit):
+                logger.exception("Refreshing metrics failed, serving the last ones")
+            self._stopped.wait(self.interval)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """GET the server's dataset resources, answering If-None-Match with 304"""
+
+    def do_GET(self):
+        dataset = self.server.dataset
+        if not dataset.ready:
+            self._send_error(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "metrics are still being collected",
+                {"Retry-After": str(NOT_READY_RETRY_SECONDS)},
+            )
+            return
+        path = self.path.split("?")[0].rstrip("/") or "/"
+        resource = dataset.get(path)
+        if resource is None:
+            self._send_error(HTTPStatus.NOT_FOUND, f"no metrics at {path}")
+            return
+        if resource.etag in self.headers.get("If-None-Match", "").split(", "):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", resource.etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", resource.content_type)
+        self.send_header("Content-Length", str(len(resource.body)))
+        self.send_header("ETag", resource.etag)
+        # clients can keep the body, but revalidate it with the ETag
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(resource.body)
+
+    def _send_error(self, status, message, headers=None):
+        body = json.dumps({"error": message}).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", JSON_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """HTTP server answering from a MetricsDataset, each request on its own thread"""
+
+    daemon_threads = True
+
+    def __init__(self, address, dataset):
+        super().__init__(address, MetricsRequestHandler)
+        self.dataset = dataset
@@ -0,0 +1,217 @@
+# module to persist raw PR nodes between runs, so reports only fetch the PRs that changed
+# and the metric rows calculated from them, so reports only recalculate those PRs
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import attr
+
+from config import METRICS_CACHE
+
+CACHE_DB_NAME = "pr_nodes.sqlite"
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pr_nodes (
+    organization TEXT NOT NULL,
+    repo_name TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    node TEXT NOT NULL,
+    PRIMARY KEY (organization, repo_name, number)
+);
+CREATE TABLE IF NOT EXISTS repo_sync (
+    organization TEXT NOT NULL,
+    repo_name TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (organization, repo_name)
+);
+CREATE TABLE IF NOT EXISTS repo_coverage (
+    organization TEXT NOT NULL,
+    repo_name TEXT NOT NULL,
+    complete_below INTEGER NOT NULL,
+    PRIMARY KEY (organization, repo_name)
+);
+CREATE TABLE IF NOT EXISTS pr_metric_rows (
+    organization TEXT NOT NULL,
+    repo_name TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    row TEXT NOT NULL,
+    PRIMARY KEY (organization, repo_name, number)
+);
+"""
+
+
+def pr_number(pr_node):
+    return int(pr_node["url"].split("/")[-1])
+
+
+@attr.s
+class PRNodeCache:
+    """SQLite store of the raw PR nodes returned by the PR query
+
+    Nodes are keyed on org/repo/PR number and carry the PR's updatedAt, so a refresh
+    only needs the PRs updated since the last sync.
+    The repo's coverage is the PR number every PR from the newest down to was fetched,
+    older PRs in the cache, like ones updated since, can have gaps between them.
+    A journal of the metric rows calculated from the nodes is kept alongside,
+    each row is valid while its PR's updatedAt and the fingerprint it was stored with match.
+    A connection is opened per call, so one cache instance can be shared between threads.
+    """
+
+    cache_dir = attr.ib(converter=Path, default=METRICS_CACHE)
+
+    @property
+    def db_path(self):
+        return self.cache_dir.joinpath(CACHE_DB_NAME)
+
+    def _connect(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path)
+        connection.executescript(CACHE_SCHEMA)
+        return connection
+
+    def last_sync(self, organization, repo_name):
+        """The most recent updatedAt stored for the repo, None if it was never synced"""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT updated_at FROM repo_sync WHERE organization=? AND repo_name=?",
+                (organization, repo_name),
+            ).fetchone()
+        return row[0] if row else None
+
+    def covered_count(self, organization, repo_name):
+        """Number of cached PRs within the repo's coverage, without gaps between them
+
+        0 when the repo was never fetched from its newest PR, see store's complete_below
+        """
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM pr_nodes JOIN repo_coverage "
+                "USING (organization, repo_name) "
+                "WHERE organization=? AND repo_name=? AND number >= complete_below",
+                (organization, repo_name),
+            ).fetchone()[0]
+
+    def store(
+        self, organization, repo_name, pr_nodes, advance_sync=True, complete_below=None
+    ):
+        """Insert or replace the given raw PR nodes, moving the repo's sync watermark
+
+        Args:
+            pr_nodes: list of PR node dictionaries, as returned by the GQL query
+            advance_sync: move the watermark, False when the nodes aren't every PR
+                updated since the last sync, like the results of a search
+            complete_below: PR number the nodes include every PR down to,
+                when they're the repo's newest PRs by number, extends the repo's coverage
+        """
+        with closing(self._connect()) as connection, connection:
+            if complete_below is not None:
+                connection.execute(
+                    "INSERT INTO repo_coverage VALUES (?, ?, ?) "
+                    "ON CONFLICT (organization, repo_name) "
+                    "DO UPDATE SET complete_below=MIN(complete_below, "
+                    "excluded.complete_below)",
+                    (organization, repo_name, complete_below),
+                )
+            if not pr_nodes:
+                return
+            newest = max(n["updatedAt"] for n in pr_nodes)
+            connection.executemany(
+                "INSERT OR REPLACE INTO pr_nodes VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        organization,
+                        repo_name,
+                        pr_number(n),
+                        n["updatedAt"],
+                        json.dumps(n),
+                    )
+                    for n in pr_nodes
+                ],
+            )
+            if not advance_sync:
+                return
+            connection.execute(
+                "INSERT INTO repo_sync VALUES (?, ?, ?) "
+                "ON CONFLICT (organization, repo_name) "
+                "DO UPDATE SET updated_at=MAX(updated_at, excluded.updated_at)",
+                (organization, repo_name, newest),
+            )
+
+    def pr_nodes(self, organization, repo_name, count):
+        """The cached PR nodes for the repo, newest PR number first"""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT node FROM pr_nodes WHERE organization=? AND repo_name=? "
+                "ORDER BY number DESC LIMIT ?",
+                (organization, repo_name, count),
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def pr_versions(self, organization, repo_name, count):
+        """Number and updatedAt of the newest count cached PRs, newest PR number first"""
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT number, updated_at FROM pr_nodes "
+                "WHERE organization=? AND repo_name=? ORDER BY number DESC LIMIT ?",
+                (organization, repo_name, count),
+            ).fetchall()
+
+    def pr_nodes_by_number(self, organization, repo_name, numbers):
+        """The cached PR nodes with the given PR numbers, newest PR number first"""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT node FROM pr_nodes WHERE organization=? AND repo_name=? "
+                "AND number IN (SELECT value FROM json_each(?)) ORDER BY number DESC",
+                (organization, repo_name, json.dumps(list(numbers))),
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def metric_rows(self, organization, repo_name, fingerprint, versions):
+        """Journaled metric rows still valid for the PR versions, keyed on PR number
+
+        Args:
+            fingerprint: the fingerprint the rows were stored with, like the reviewer teams
+            versions: tuples of PR number and updatedAt, like pr_versions
+
+        Returns:
+            dict of the stored rows, None for PRs stored without a row
+        """
+        updated_at = dict(versions)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT number, updated_at, row FROM pr_metric_rows "
+                "WHERE organization=? AND repo_name=? AND fingerprint=? "
+                "AND number IN (SELECT value FROM json_each(?))",
+                (organization, repo_name, fingerprint, json.dumps(list(updated_at))),
+            ).fetchall()
+        return {
+            number: json.loads(row)
+            for number, row_updated_at, row in rows
+            if row_updated_at == updated_at[number]
+        }
+
+    def store_metric_rows(self, organization, repo_name, fingerprint, rows):
+        """Insert or replace journaled metric rows
+
+        Args:
+            rows: tuples of PR number, updatedAt and the row, None for PRs without one
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO pr_metric_rows VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        organization,
+                        repo_name,
+                        number,
+                        updated_at,
+                        fingerprint,
+                        json.dumps(row),
+                    )
+                    for number, updated_at, row in rows
+                ],
+            )
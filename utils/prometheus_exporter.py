@@ -0,0 +1,134 @@
+# module for the serve command's /metrics, review latencies and reviews in the prometheus format
+import math
+import threading
+from collections import Counter
+from collections import defaultdict
+
+import attr
+
+from .metrics_calculators import EMPTY
+from .metrics_calculators import HEADER_H_COM
+from .metrics_calculators import HEADER_H_T1
+from .metrics_calculators import HEADER_H_T2
+
+# prometheus text exposition format
+# https://prometheus.io/docs/instrumenting/exposition_formats/
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# upper bounds in hours, from an hour to a month
+LATENCY_BUCKETS = [1, 2, 4, 8, 12, 24, 48, 72, 120, 168, 336, 720]
+# histogram names and help, for the latency columns of the pr_metrics rows
+LATENCY_METRICS = {
+    HEADER_H_COM: (
+        "github_pr_hours_to_first_review",
+        "Hours from a PR being opened or ready for review to its first review or comment",
+    ),
+    HEADER_H_T1: (
+        "github_pr_hours_to_tier1",
+        "Hours from a PR being opened or ready for review to its first tier1 review",
+    ),
+    HEADER_H_T2: (
+        "github_pr_hours_to_tier2",
+        "Hours from a PR being opened or ready for review to its first tier2 review",
+    ),
+}
+REVIEWED_PRS_METRIC = "github_pr_reviewed_prs_total"
+REVIEWED_PRS_HELP = "PRs each tier reviewer reviewed or commented on"
+# reviewer columns of the pr_metrics rows, comma separated logins
+REVIEWER_HEADERS = {"tier1": "Tier1 Reviewers", "tier2": "Tier2 Reviewers"}
+
+
+def escape_label(value):
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def sample(name, labels, value):
+    """A sample line, like name{org="SatelliteQE",repo="robottelo"} 3"""
+    label_pairs = ",".join(f'{k}="{escape_label(str(v))}"' for k, v in labels.items())
+    return f"{name}{{{label_pairs}}} {value}"
+
+
+@attr.s
+class ReviewMetricsState:
+    """Observations from every PR's pr_metrics rows seen by the serve command, by org/repo
+
+    A PR's latency is observed once, the first time its row has one,
+    and a tier reviewer is counted once for each PR they reviewed,
+    so the histograms and counters only grow while the process runs, like prometheus expects.
+    Later changes to a PR's row, like a deleted review, aren't taken back.
+    """
+
+    # hours by latency header and PR
+    _hours = attr.ib(factory=lambda: defaultdict(lambda: defaultdict(dict)), repr=False)
+    # (tier, reviewer, PR) of each PR counted for a reviewer
+    _reviewed = attr.ib(factory=lambda: defaultdict(set), repr=False)
+    _lock = attr.ib(factory=threading.Lock, repr=False)
+
+    def update(self, organization, repository, pr_metrics):
+        with self._lock:
+            repo_hours = self._hours[(organization, repository)]
+            reviewed = self._reviewed[(organization, repository)]
+            for row in pr_metrics:
+                for header in LATENCY_METRICS:
+                    if row[header] != EMPTY:
+                        repo_hours[header].setdefault(row["PR"], row[header])
+                reviewed.update(
+                    (tier, login, row["PR"])
+                    for tier, header in REVIEWER_HEADERS.items()
+                    for login in row[header].split(", ")
+                    if login
+                )
+
+    def exposition(self):
+        """The latency histograms and reviewed PR counters of every repo, in the text format"""
+        with self._lock:
+            repo_hours = {
+                key: {
+                    header: list(hours.values()) for header, hours in by_header.items()
+                }
+                for key, by_header in self._hours.items()
+            }
+            repo_reviews = {
+                key: Counter((tier, login) for tier, login, _ in reviewed)
+                for key, reviewed in self._reviewed.items()
+            }
+
+        lines = []
+        for header, (name, help_text) in LATENCY_METRICS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (organization, repository), by_header in sorted(repo_hours.items()):
+                labels = {"org": organization, "repo": repository}
+                hours = by_header.get(header, [])
+                for bound in LATENCY_BUCKETS:
+                    lines.append(
+                        sample(
+                            f"{name}_bucket",
+                            {**labels, "le": float(bound)},
+                            sum(1 for h in hours if h <= bound),
+                        )
+                    )
+                lines += [
+                    sample(f"{name}_bucket", {**labels, "le": "+Inf"}, len(hours)),
+                    sample(f"{name}_sum", labels, math.fsum(hours)),
+                    sample(f"{name}_count", labels, len(hours)),
+                ]
+
+        lines += [
+            f"# HELP {REVIEWED_PRS_METRIC} {REVIEWED_PRS_HELP}",
+            f"# TYPE {REVIEWED_PRS_METRIC} counter",
+        ]
+        for (organization, repository), reviews in sorted(repo_reviews.items()):
+            for (tier, reviewer), count in sorted(reviews.items()):
+                lines.append(
+                    sample(
+                        REVIEWED_PRS_METRIC,
+                        {
+                            "org": organization,
+                            "repo": repository,
+                            "tier": tier,
+                            "reviewer": reviewer,
+                        },
+                        count,
+                    )
+                )
+        return "\n".join(lines) + "\n"
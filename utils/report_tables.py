@@ -0,0 +1,93 @@
+# module for report tables, formatted once and rendered for the terminal and output files
+from itertools import zip_longest
+
+import attr
+from tabulate import tabulate
+
+# column alignments, like tabulate's default numalign and stralign
+NUMBER_ALIGN = "decimal"
+STRING_ALIGN = "left"
+
+
+def cell_type(value):
+    """None, int, float or str, the type tabulate would parse the cell value as"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return str
+    if isinstance(value, (int, float)):
+        return type(value)
+    for number_type in int, float:
+        try:
+            number_type(value)
+        except (TypeError, ValueError):
+            continue
+        return number_type
+    return str
+
+
+def column_type(values):
+    """The most generic cell type of the column, None when every cell is empty"""
+    types = {cell_type(v) for v in values}
+    for generic_type in str, float, int:
+        if generic_type in types:
+            return generic_type
+    return None
+
+
+def format_cell(value, column, floatfmt):
+    if value is None:
+        return ""
+    if column is float:
+        return format(float(value), floatfmt)
+    return str(value)
+
+
+@attr.s(frozen=True)
+class ReportTable:
+    """A report dataset with its cells formatted, ready to render in any tabulate format
+
+    Rows are typed and formatted once, instead of by every tabulate call,
+    which then renders the formatted strings without parsing numbers again.
+    Renders like tabulate(table, headers="keys") of the dataset.
+    """
+
+    headers = attr.ib()
+    rows = attr.ib()
+    colalign = attr.ib()
+
+    @classmethod
+    def from_dicts(cls, table, floatfmt="g"):
+        """Format a list of dicts, headers are their keys in order of appearance
+
+        Or a dict of columns, headers are its keys, shorter columns are padded with empty cells
+        """
+        if isinstance(table, dict):
+            headers = list(table)
+            rows = list(zip_longest(*table.values()))
+            columns = [[row[i] for row in rows] for i in range(len(headers))]
+        else:
+            headers = list(dict.fromkeys(key for row in table for key in row))
+            columns = [[row.get(header) for row in table] for header in headers]
+        types = [column_type(values) for values in columns]
+        formatted = [
+            [format_cell(v, column, floatfmt) for v in values]
+            for values, column in zip(columns, types)
+        ]
+        return cls(
+            headers=headers,
+            rows=[list(row) for row in zip(*formatted)],
+            colalign=[
+                NUMBER_ALIGN if column in (int, float) else STRING_ALIGN
+                for column in types
+            ],
+        )
+
+    def render(self, tablefmt):
+        return tabulate(
+            self.rows,
+            headers=self.headers,
+            tablefmt=tablefmt,
+            colalign=self.colalign,
+            disable_numparse=True,
+        )
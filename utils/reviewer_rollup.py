@@ -0,0 +1,154 @@
+# module to persist weekly reviewer action counts, so trends don't need the PRs refetched
+import sqlite3
+from collections import Counter
+from contextlib import closing
+from datetime import MAXYEAR
+from pathlib import Path
+
+import attr
+
+from config import METRICS_CACHE
+from .GQL_Queries.github_wrappers import MERGED
+from .GQL_Queries.github_wrappers import OPENED
+
+ROLLUP_DB_NAME = "reviewer_rollup.sqlite"
+
+# pr_actions holds each PR's counts, so a PR updated with new reviews can be replaced,
+# the triggers keep weekly_actions, the rollup read by reports, in step with it
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pr_actions (
+    organization TEXT NOT NULL,
+    repo_name TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    reviewer TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    action TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (organization, repo_name, number, year, week, reviewer, tier, action)
+);
+CREATE TABLE IF NOT EXISTS weekly_actions (
+    organization TEXT NOT NULL,
+    repo_name TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    reviewer TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    action TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (organization, repo_name, year, week, reviewer, tier, action)
+);
+CREATE TRIGGER IF NOT EXISTS pr_actions_insert AFTER INSERT ON pr_actions BEGIN
+    INSERT INTO weekly_actions VALUES (
+        NEW.organization, NEW.repo_name, NEW.year, NEW.week,
+        NEW.reviewer, NEW.tier, NEW.action, NEW.count
+    )
+    ON CONFLICT (organization, repo_name, year, week, reviewer, tier, action)
+    DO UPDATE SET count=count + excluded.count;
+END;
+CREATE TRIGGER IF NOT EXISTS pr_actions_delete AFTER DELETE ON pr_actions BEGIN
+    UPDATE weekly_actions SET count=count - OLD.count
+    WHERE organization=OLD.organization AND repo_name=OLD.repo_name
+        AND year=OLD.year AND week=OLD.week
+        AND reviewer=OLD.reviewer AND tier=OLD.tier AND action=OLD.action;
+    DELETE FROM weekly_actions
+    WHERE organization=OLD.organization AND repo_name=OLD.repo_name
+        AND year=OLD.year AND week=OLD.week
+        AND reviewer=OLD.reviewer AND tier=OLD.tier AND action=OLD.action
+        AND count <= 0;
+END;
+"""
+
+
+@attr.s
+class ReviewerRollup:
+    """SQLite rollup of reviewer action counts, by org/repo, ISO week, reviewer, tier and action
+
+    Updated from the PRs each report fetches, replacing the counts of PRs seen before,
+    so the rollup grows into a history longer than any one fetch.
+    PRs keep the tiers they were classified with when they were last updated.
+    A connection is opened per call, so one rollup instance can be shared between threads.
+    """
+
+    cache_dir = attr.ib(converter=Path, default=METRICS_CACHE)
+
+    @property
+    def db_path(self):
+        return self.cache_dir.joinpath(ROLLUP_DB_NAME)
+
+    def _connect(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path)
+        connection.executescript(ROLLUP_SCHEMA)
+        return connection
+
+    def update(self, organization, repo_name, prs):
+        """Replace the action counts of the given PRs
+
+        Args:
+            prs: PRWrapper instances, their actions are read from PRWrapper.team_actions
+        """
+        if not prs:
+            return
+        rows = []
+        for pr in prs:
+            counts = Counter(
+                (*created_at.isocalendar()[0:2], reviewer, tier, action)
+                for tier, reviewer, created_at, action in pr.team_actions()
+            )
+            rows.extend(
+                (organization, repo_name, int(pr.number), *key, count)
+                for key, count in counts.items()
+            )
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "DELETE FROM pr_actions WHERE organization=? AND repo_name=? AND number=?",
+                [(organization, repo_name, int(pr.number)) for pr in prs],
+            )
+            connection.executemany(
+                "INSERT INTO pr_actions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def weekly_counts(self, organization, repo_name, since_week=None, until_week=None):
+        """Action counts of each reviewer by week, summed over the actions
+
+        Args:
+            since_week: (ISO year, ISO week) tuple of the first week, None for all of them
+            until_week: (ISO year, ISO week) tuple of the last week, None for all of them
+
+        Returns:
+            list of (tier, (ISO year, ISO week), reviewer, count) tuples,
+            ordered by tier, week and reviewer, with the PRs opened and merged last
+        """
+        since_year, since = since_week or (0, 0)
+        until_year, until = until_week or (MAXYEAR, 53)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT tier, year, week, reviewer, SUM(count) FROM weekly_actions "
+                "WHERE organization=? AND repo_name=? "
+                "AND (year, week) >= (?, ?) AND (year, week) <= (?, ?) "
+                "GROUP BY tier, year, week, reviewer "
+                "ORDER BY tier, year, week, reviewer IN (?, ?), reviewer",
+                (
+                    organization,
+                    repo_name,
+                    since_year,
+                    since,
+                    until_year,
+                    until,
+                    OPENED,
+                    MERGED,
+                ),
+            ).fetchall()
+        return [(tier, (y, w), reviewer, count) for tier, y, w, reviewer, count in rows]
+
+    def repositories(self, organization):
+        """Names of the org's repos with action counts in the rollup, sorted"""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT DISTINCT repo_name FROM weekly_actions WHERE organization=? "
+                "ORDER BY repo_name",
+                (organization,),
+            ).fetchall()
+        return [r[0] for r in rows]
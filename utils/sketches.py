@@ -0,0 +1,89 @@
+"""
+Mergeable streaming quantile sketch, for percentiles of review latencies
+
+Values are counted in logarithmic buckets, after DDSketch (Masson et al., VLDB 2019),
+so any quantile is estimated within a relative error of relative_accuracy,
+with memory depending on the range of the values instead of their number.
+Sketches with the same accuracy merge by adding their bucket counts,
+per-repo sketches merge into org-wide ones without keeping any raw values.
+"""
+import math
+from collections import Counter
+
+import attr
+
+
+@attr.s
+class QuantileSketch:
+    """Quantile sketch with bucket counts for positive and negative values, and zeros"""
+
+    relative_accuracy = attr.ib(default=0.01)
+    positive = attr.ib(factory=Counter, repr=False)
+    negative = attr.ib(factory=Counter, repr=False)
+    zero_count = attr.ib(default=0)
+    count = attr.ib(default=0)
+
+    @relative_accuracy.validator
+    def _check_accuracy(self, attribute, value):
+        if not 0 < value < 1:
+            raise ValueError(f"relative_accuracy must be between 0 and 1, not {value}")
+
+    @property
+    def gamma(self):
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    def _key(self, magnitude):
+        return math.ceil(math.log(magnitude, self.gamma))
+
+    def _value(self, key):
+        # the midpoint of the bucket, relative to its bounds
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value):
+        if value > 0:
+            self.positive[self._key(value)] += 1
+        elif value < 0:
+            self.negative[self._key(-value)] += 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """Add the counts of another sketch with the same accuracy to this one"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(
+                "Can't merge sketches with different accuracies: "
+                f"{self.relative_accuracy} and {other.relative_accuracy}"
+            )
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _buckets(self):
+        """(value, count) for every bucket, lowest value first"""
+        for key in sorted(self.negative, reverse=True):
+            yield -self._value(key), self.negative[key]
+        if self.zero_count:
+            yield 0, self.zero_count
+        for key in sorted(self.positive):
+            yield self._value(key), self.positive[key]
+
+    def quantile(self, q):
+        """Estimated value at quantile q (0 to 1), None for an empty sketch"""
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile must be between 0 and 1, not {q}")
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, count in self._buckets():
+            seen += count
+            if seen > rank:
+                return value
+        return value  # only reached through float rounding of rank
@@ -0,0 +1,83 @@
+# module to persist reviewer team members between runs, refetched once they're older than a TTL
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+import attr
+
+from config import METRICS_CACHE
+
+TEAM_CACHE_DB_NAME = "team_members.sqlite"
+DEFAULT_TTL_HOURS = 24
+
+TEAM_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS team_members (
+    organization TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    members TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (organization, slug)
+);
+"""
+
+
+def members_fingerprint(logins):
+    """Hash of a team's member logins, in any order"""
+    return hashlib.sha1("\n".join(sorted(logins)).encode()).hexdigest()
+
+
+@attr.s
+class TeamMembersCache:
+    """SQLite store of org team member logins, keyed on org/team slug
+
+    Members are fresh for ttl_hours after they were last fetched, then fetched again.
+    The fingerprint of the members tells whether a refetch changed them.
+    A connection is opened per call, so one cache instance can be shared between threads.
+    """
+
+    cache_dir = attr.ib(converter=Path, default=METRICS_CACHE)
+    ttl_hours = attr.ib(converter=float, default=DEFAULT_TTL_HOURS)
+
+    @property
+    def db_path(self):
+        return self.cache_dir.joinpath(TEAM_CACHE_DB_NAME)
+
+    def _connect(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.db_path)
+        connection.executescript(TEAM_CACHE_SCHEMA)
+        return connection
+
+    def members(self, organization, slug):
+        """The team's cached member logins, None if they were never fetched or are stale"""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT members, checked_at FROM team_members "
+                "WHERE organization=? AND slug=?",
+                (organization, slug),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_hours * 3600:
+            return None
+        return json.loads(row[0])
+
+    def store(self, organization, slug, logins):
+        """Store freshly fetched member logins, restarting the team's TTL
+
+        Returns:
+            bool, whether the members changed since they were last stored
+        """
+        fingerprint = members_fingerprint(logins)
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT fingerprint FROM team_members WHERE organization=? AND slug=?",
+                (organization, slug),
+            ).fetchone()
+            connection.execute(
+                "INSERT OR REPLACE INTO team_members VALUES (?, ?, ?, ?, ?)",
+                (organization, slug, json.dumps(logins), fingerprint, time.time()),
+            )
+        return row is None or row[0] != fingerprint